@@ -0,0 +1,707 @@
+"""
+Generate a synthetic credit portfolio at a configurable scale for load tests.
+
+02_data/02_load_sample_data.sql builds the demo dataset: 20 companies, 50 deals,
+100 assets, month-end snapshots only. This generator builds the same star
+schema at any multiple of that volume, with daily or month-end snapshot
+density, so the dashboard loaders and the agent can be exercised at production
+row counts.
+
+The named demo entities (HealthTech Solutions, the ACME funds, John Williams)
+are always present so the agent's sample questions still resolve. Measures
+are internally consistent on every row:
+
+  unfunded_par = commitment - funded_par            (exact, to the cent)
+  exposure     = funded_par + 50% of unfunded_par   (undrawn credit conversion)
+  fair_value   = exposure * mark
+  cost         = funded_par * a per-asset cost ratio
+
+Commitments grow about 1% a month and facilities draw down over time, so the
+trend charts have a shape. Watchlist deals carry lower marks.
+
+Output formats:
+
+  sql      A set-based Snowflake script that generates the data server-side
+           with GENERATOR, so nothing is uploaded. Practical at any scale.
+  csv      One CSV file per table plus a load.sql that PUTs and COPYs them.
+  parquet  As csv, in Parquet (requires pyarrow).
+
+The file formats are generated locally from one seeded random stream and are
+byte-for-byte reproducible for the same arguments. The SQL script uses the same
+model, seeded through HASH, so its values differ row by row but its
+distributions match.
+
+Usage:
+  python benchmarks/generate_data.py --scale 10 --format sql --out load_10x.sql
+  python benchmarks/generate_data.py --scale 100 --density daily --format parquet --out build/load_100x
+  python benchmarks/generate_data.py --deals 5000 --assets-per-deal 4 --format csv --out build/custom
+"""
+
+import argparse
+import csv
+import json
+import math
+import os
+import random
+import sys
+from collections import namedtuple
+from datetime import date, timedelta
+
+# Demo dataset volume that --scale multiplies
+BASELINE = {"companies": 20, "deals": 50, "funds": 10, "sponsors": 30}
+DEFAULT_ASSETS_PER_DEAL = 2
+
+INDUSTRIES = [
+    "Healthcare Technology", "Healthcare Services", "Technology", "Manufacturing",
+    "Retail", "Business Services", "Transportation & Logistics", "Energy",
+    "Telecommunications", "Financial Services",
+]
+REGIONS = ["Northeast", "Southeast", "Midwest", "Southwest", "West"]
+ORIGINATORS = ["John Williams", "Jennifer Martinez", "Lisa Anderson", "Mark Thompson"]
+PREPARERS = ["Jennifer Mills", "Michael Chen", "Sarah Johnson", "Robert Davis", "Emily Parker", "David Kim"]
+FACILITIES = [
+    ("Term Loan A", "First Lien"),
+    ("Revolver", "First Lien"),
+    ("Second Lien", "Second Lien"),
+    ("Delayed Draw", "First Lien"),
+]
+STRATEGIES = ["Direct Lending", "Opportunistic", "Core+", "Mezzanine"]
+SPONSOR_TYPES = ["Mega-cap", "Large-cap", "Mid-market", "Small-cap"]
+
+# Named rows the agent's sample questions depend on
+FIXED_COMPANIES = [
+    (1, "HealthTech Solutions", "Healthcare Technology", "Northeast"),
+    (2, "ACME Healthcare Partners", "Healthcare Services", "Southeast"),
+]
+FIXED_FUNDS = [
+    (1, "ACME Direct Lending Fund I", "ACME", "Direct Lending", 2020),
+    (2, "ACME Opportunistic Credit Fund II", "ACME", "Opportunistic", 2021),
+    (3, "ACME Core+ Fund III", "ACME", "Core+", 2022),
+]
+
+# Watchlist status: cumulative probability, rating choices, mark discount
+WATCHLIST_PROFILE = [
+    ("None", 0.80, (2, 3), 0.00),
+    ("Watchlist", 0.94, (3, 4), 0.03),
+    ("Intensive Care", 1.00, (4, 5), 0.08),
+]
+
+# Measure model, shared by the local and server-side generators
+COMMITMENT_RANGE = (1_000_000, 50_000_000)
+COMMITMENT_MONTHLY_GROWTH = 0.01
+FUNDED_RATIO_RANGE = (0.60, 0.90)
+FUNDED_RATIO_MONTHLY_DRAW = 0.005
+FUNDED_RATIO_CAP = 0.95
+UNDRAWN_CCF = 0.5
+MARK_RANGE = (0.98, 1.02)
+MARK_NOISE = 0.01
+MARK_BOUNDS = (0.50, 1.05)
+COST_RATIO_RANGE = (0.98, 1.02)
+DAYS_PER_MONTH = 30.4375
+
+# Column type codes: int, str, date, bool, money (integer cents), mark (integer 1/10000ths)
+TABLES = [
+    ("DIM_DATE", [
+        ("date_key", "int"), ("calendar_date", "date"), ("year", "int"), ("quarter", "int"),
+        ("month", "int"), ("day_of_month", "int"), ("month_end_date", "date"), ("is_month_end", "bool"),
+    ]),
+    ("DIM_COMPANY", [
+        ("company_id", "int"), ("company_name", "str"), ("industry", "str"), ("region", "str"),
+    ]),
+    ("DIM_SPONSOR", [
+        ("sponsor_id", "int"), ("sponsor_name", "str"), ("sponsor_type", "str"),
+    ]),
+    ("DIM_FUND", [
+        ("fund_id", "int"), ("fund_name", "str"), ("fund_family", "str"),
+        ("strategy_type", "str"), ("vintage_year", "int"),
+    ]),
+    ("DIM_DEAL", [
+        ("deal_id", "int"), ("deal_name", "str"), ("company_id", "int"), ("deal_date", "date"),
+        ("watchlist", "str"), ("rating", "int"), ("originator1", "str"), ("preparer", "str"),
+    ]),
+    ("DIM_ASSET", [
+        ("asset_id", "int"), ("asset_name", "str"), ("deal_id", "int"), ("facility_type", "str"),
+        ("security_type", "str"), ("maturity_date", "date"),
+    ]),
+    ("FACT_POSITION_SNAPSHOT", [
+        ("snapshot_fact_id", "int"), ("date_id", "int"), ("company_id", "int"), ("deal_id", "int"),
+        ("asset_id", "int"), ("fund_id", "int"), ("sponsor_id", "int"),
+        ("exposure", "money"), ("commitment", "money"), ("fair_value", "money"),
+        ("funded_par", "money"), ("unfunded_par", "money"), ("cost", "money"), ("mark", "mark"),
+    ]),
+]
+
+AssetProfile = namedtuple("AssetProfile", [
+    "asset_id", "deal_id", "company_id", "fund_id", "sponsor_id",
+    "commitment0", "funded0", "mark0", "cost_ratio",
+])
+
+
+def date_key(day):
+    return day.year * 10000 + day.month * 100 + day.day
+
+
+def last_day_of_month(day):
+    following = (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return following - timedelta(days=1)
+
+
+class DatasetSpec:
+    """Entity counts, snapshot calendar and seed for one generated dataset."""
+
+    def __init__(self, scale=1.0, companies=None, deals=None, assets_per_deal=DEFAULT_ASSETS_PER_DEAL,
+                 funds=None, sponsors=None, density="month-end", start=date(2024, 1, 1), end=None, seed=42):
+        def scaled(name, override, minimum):
+            return max(minimum, override or math.ceil(BASELINE[name] * scale))
+
+        self.scale = scale
+        self.companies = scaled("companies", companies, len(FIXED_COMPANIES))
+        self.deals = scaled("deals", deals, 1)
+        self.funds = scaled("funds", funds, len(FIXED_FUNDS))
+        self.sponsors = scaled("sponsors", sponsors, 1)
+        self.assets_per_deal = assets_per_deal
+        self.density = density
+        self.start = start
+        self.end = end or date.today()
+        self.seed = seed
+        if self.end < self.start:
+            raise ValueError(f"end {self.end} is before start {self.start}")
+
+    @property
+    def assets(self):
+        return self.deals * self.assets_per_deal
+
+    def calendar(self):
+        """DIM_DATE spine: start through the end of the final year."""
+        day, last = self.start, date(self.end.year, 12, 31)
+        while day <= last:
+            yield day
+            day += timedelta(days=1)
+
+    def snapshot_dates(self):
+        """Daily, or every month-end plus the final date (the dashboard's 'current' snapshot)."""
+        dates = [day for day in self.calendar() if day <= self.end]
+        if self.density == "daily":
+            return dates
+        return [day for day in dates if day == last_day_of_month(day) or day == self.end]
+
+    def summary(self):
+        snapshots = len(self.snapshot_dates())
+        return {
+            "scale": self.scale,
+            "seed": self.seed,
+            "density": self.density,
+            "start": self.start.isoformat(),
+            "end": self.end.isoformat(),
+            "companies": self.companies,
+            "deals": self.deals,
+            "assets": self.assets,
+            "funds": self.funds,
+            "sponsors": self.sponsors,
+            "snapshot_dates": snapshots,
+            "fact_rows": snapshots * self.assets,
+        }
+
+
+# ============================================================================
+# Local generation (csv / parquet)
+# ============================================================================
+
+class LocalGenerator:
+    """
+    Produce every table's rows from a single seeded random stream.
+
+    Tables must be consumed in TABLES order: the fact table needs the deal and
+    asset profiles drawn while the dimensions were generated.
+    """
+
+    def __init__(self, spec):
+        self.spec = spec
+        self.rng = random.Random(spec.seed)
+        self.deals = {}
+        self.assets = []
+
+    def rows(self, table):
+        return getattr(self, "_" + table.lower())()
+
+    def _dim_date(self):
+        for day in self.spec.calendar():
+            month_end = last_day_of_month(day)
+            yield (date_key(day), day, day.year, (day.month - 1) // 3 + 1, day.month, day.day,
+                   month_end, day == month_end)
+
+    def _dim_company(self):
+        yield from FIXED_COMPANIES
+        for company_id in range(len(FIXED_COMPANIES) + 1, self.spec.companies + 1):
+            yield (company_id, f"Portfolio Company {company_id:06d}",
+                   self.rng.choice(INDUSTRIES), self.rng.choice(REGIONS))
+
+    def _dim_sponsor(self):
+        for sponsor_id in range(1, self.spec.sponsors + 1):
+            yield (sponsor_id, f"Sponsor Partners {sponsor_id:05d}", self.rng.choice(SPONSOR_TYPES))
+
+    def _dim_fund(self):
+        yield from FIXED_FUNDS
+        for fund_id in range(len(FIXED_FUNDS) + 1, self.spec.funds + 1):
+            yield (fund_id, f"Credit Fund {fund_id:05d}", f"Fund Family {fund_id % 50:02d}",
+                   self.rng.choice(STRATEGIES), self.rng.randint(2018, 2024))
+
+    def _dim_deal(self):
+        rng = self.rng
+        origination_window = (self.spec.end - self.spec.start).days + 730
+        for deal_id in range(1, self.spec.deals + 1):
+            # Spread deals across companies so every company has at least one
+            company_id = (deal_id - 1) % self.spec.companies + 1
+            draw = rng.random()
+            watchlist, _, ratings, discount = next(p for p in WATCHLIST_PROFILE if draw < p[1])
+            deal_date = self.spec.start - timedelta(days=730) + timedelta(days=rng.randrange(origination_window))
+            self.deals[deal_id] = (company_id, discount, deal_date)
+            yield (deal_id, f"Credit Facility {deal_id:06d}", company_id, deal_date, watchlist,
+                   rng.choice(ratings), ORIGINATORS[(deal_id - 1) % len(ORIGINATORS)], rng.choice(PREPARERS))
+
+    def _dim_asset(self):
+        rng = self.rng
+        for deal_id, (company_id, discount, deal_date) in self.deals.items():
+            for index in range(self.spec.assets_per_deal):
+                asset_id = (deal_id - 1) * self.spec.assets_per_deal + index + 1
+                facility_type, security_type = FACILITIES[index % len(FACILITIES)]
+                self.assets.append(AssetProfile(
+                    asset_id, deal_id, company_id,
+                    rng.randint(1, self.spec.funds), rng.randint(1, self.spec.sponsors),
+                    rng.uniform(*COMMITMENT_RANGE), rng.uniform(*FUNDED_RATIO_RANGE),
+                    rng.uniform(*MARK_RANGE) - discount, rng.uniform(*COST_RATIO_RANGE),
+                ))
+                yield (asset_id, f"Credit Facility {deal_id:06d} - {facility_type}", deal_id,
+                       facility_type, security_type, deal_date.replace(year=deal_date.year + 5, day=min(deal_date.day, 28)))
+
+    def _fact_position_snapshot(self):
+        rng = self.rng
+        low, high = MARK_BOUNDS
+        fact_id = 0
+        # Date-major order matches the FACT_POSITION_SNAPSHOT clustering key
+        for day in self.spec.snapshot_dates():
+            key = date_key(day)
+            months = (day - self.spec.start).days / DAYS_PER_MONTH
+            growth = 1 + COMMITMENT_MONTHLY_GROWTH * months
+            drawn = FUNDED_RATIO_MONTHLY_DRAW * months
+            for asset in self.assets:
+                fact_id += 1
+                commitment = round(asset.commitment0 * growth * 100)
+                funded_par = round(commitment * min(FUNDED_RATIO_CAP, asset.funded0 + drawn))
+                unfunded_par = commitment - funded_par
+                mark = round(min(high, max(low, asset.mark0 + MARK_NOISE * (rng.random() - 0.5))) * 10000)
+                exposure = funded_par + round(unfunded_par * UNDRAWN_CCF)
+                yield (fact_id, key, asset.company_id, asset.deal_id, asset.asset_id, asset.fund_id,
+                       asset.sponsor_id, exposure, commitment, round(exposure * mark / 10000),
+                       funded_par, unfunded_par, round(funded_par * asset.cost_ratio), mark)
+
+
+def format_csv_value(value, kind):
+    if kind == "money":
+        return "%d.%02d" % divmod(value, 100)
+    if kind == "mark":
+        return "%d.%04d" % divmod(value, 10000)
+    if kind == "bool":
+        return "TRUE" if value else "FALSE"
+    if kind == "date":
+        return value.isoformat()
+    return value
+
+
+def write_csv(generator, out_dir):
+    counts = {}
+    for table, columns in TABLES:
+        kinds = [kind for _, kind in columns]
+        count = 0
+        with open(os.path.join(out_dir, f"{table}.csv"), "w", newline="", encoding="utf-8") as handle:
+            writer = csv.writer(handle)
+            writer.writerow([name for name, _ in columns])
+            for row in generator.rows(table):
+                writer.writerow([format_csv_value(value, kind) for value, kind in zip(row, kinds)])
+                count += 1
+        counts[table] = count
+    return counts
+
+
+def write_parquet(generator, out_dir, batch_rows):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise SystemExit("Parquet output requires pyarrow: pip install pyarrow")
+
+    arrow_types = {"int": pa.int64(), "str": pa.string(), "date": pa.date32(), "bool": pa.bool_(),
+                   "money": pa.float64(), "mark": pa.float64()}
+    scales = {"money": 100, "mark": 10000}
+
+    counts = {}
+    for table, columns in TABLES:
+        schema = pa.schema([(name, arrow_types[kind]) for name, kind in columns])
+        divisors = [scales.get(kind) for _, kind in columns]
+        count = 0
+        with pq.ParquetWriter(os.path.join(out_dir, f"{table}.parquet"), schema) as writer:
+            batch = []
+            for row in generator.rows(table):
+                batch.append(row)
+                if len(batch) == batch_rows:
+                    writer.write_table(_arrow_batch(pa, schema, batch, divisors))
+                    count += len(batch)
+                    batch = []
+            if batch or not count:
+                writer.write_table(_arrow_batch(pa, schema, batch, divisors))
+                count += len(batch)
+        counts[table] = count
+    return counts
+
+
+def _arrow_batch(pa, schema, rows, divisors):
+    arrays = []
+    for index, divisor in enumerate(divisors):
+        values = [row[index] for row in rows]
+        if divisor:
+            values = [value / divisor for value in values]
+        arrays.append(values)
+    return pa.Table.from_arrays([pa.array(values, type=field.type) for values, field in zip(arrays, schema)],
+                                schema=schema)
+
+
+# ============================================================================
+# SQL output
+# ============================================================================
+
+SQL_HEADER = """/*******************************************************************************
+ * DEMO PROJECT: Capitol Kings Credit Portfolio Demo
+ * Script: {script} (generated by benchmarks/generate_data.py)
+ *
+ * PURPOSE:
+ *   {purpose}
+ *
+ * PARAMETERS:
+{parameters}
+ *
+ * WARNING:
+ *   Truncates and reloads every star schema table. Dashboard rollups refresh
+ *   from the new data on their next dynamic table refresh. Restore the demo
+ *   dataset with sql/02_data/02_load_sample_data.sql.
+ ******************************************************************************/
+
+USE ROLE ACCOUNTADMIN;
+USE DATABASE SNOWFLAKE_EXAMPLE;
+USE SCHEMA SFE_ANALYTICS_CREDIT;
+USE WAREHOUSE SFE_CREDIT_PORTFOLIO_WH;
+
+TRUNCATE TABLE FACT_POSITION_SNAPSHOT;
+TRUNCATE TABLE DIM_ASSET;
+TRUNCATE TABLE DIM_DEAL;
+TRUNCATE TABLE DIM_FUND;
+TRUNCATE TABLE DIM_SPONSOR;
+TRUNCATE TABLE DIM_COMPANY;
+TRUNCATE TABLE DIM_DATE;
+"""
+
+SQL_VALIDATION = """
+-- ============================================================================
+-- VALIDATION QUERIES
+-- ============================================================================
+
+SELECT
+    COUNT(*) AS fact_rows,
+    COUNT(DISTINCT date_id) AS snapshot_dates,
+    COUNT_IF(unfunded_par <> commitment - funded_par) AS unfunded_mismatches,
+    COUNT_IF(ABS(fair_value - exposure * mark) > 0.01) AS fair_value_mismatches
+FROM FACT_POSITION_SNAPSHOT;
+"""
+
+
+def sql_literal(value):
+    if isinstance(value, str):
+        return "'" + value.replace("'", "''") + "'"
+    return str(value)
+
+
+def sql_uniform(seed, kind, *columns):
+    """Deterministic uniform [0, 1) keyed on the seed, a stream name and row columns."""
+    return f"(MOD(ABS(HASH({seed}, '{kind}', {', '.join(columns)})), 1000000) / 1000000.0)"
+
+
+def sql_pick(values, uniform):
+    array = ", ".join(sql_literal(value) for value in values)
+    return f"ARRAY_CONSTRUCT({array})[FLOOR({uniform} * {len(values)})]::VARCHAR"
+
+
+def sql_sequence(count, alias="id"):
+    return f"(SELECT ROW_NUMBER() OVER (ORDER BY SEQ4()) AS {alias} FROM TABLE(GENERATOR(ROWCOUNT => {count})))"
+
+
+def sql_parameters(spec):
+    return "\n".join(f" *   {name:<15} {value}" for name, value in spec.summary().items())
+
+
+def render_generator_sql(spec):
+    """Set-based script that builds the whole dataset inside Snowflake."""
+    seed = spec.seed
+    calendar_days = (date(spec.end.year, 12, 31) - spec.start).days + 1
+    start, end = sql_literal(spec.start.isoformat()), sql_literal(spec.end.isoformat())
+    density = "TRUE" if spec.density == "daily" else f"(is_month_end OR calendar_date = {end}::DATE)"
+    fixed_companies = ", ".join(f"({', '.join(sql_literal(v) for v in row)})" for row in FIXED_COMPANIES)
+    fixed_funds = ", ".join(f"({', '.join(sql_literal(v) for v in row)})" for row in FIXED_FUNDS)
+    watchlist_draw = sql_uniform(seed, "watchlist", "id")
+    watchlist_case = "CASE " + " ".join(
+        f"WHEN {watchlist_draw} < {cumulative} THEN {sql_literal(status)}"
+        for status, cumulative, _, _ in WATCHLIST_PROFILE[:-1]
+    ) + f" ELSE {sql_literal(WATCHLIST_PROFILE[-1][0])} END"
+    rating_case = "CASE watchlist " + " ".join(
+        f"WHEN {sql_literal(status)} THEN {ratings[0]} + FLOOR({sql_uniform(seed, 'rating', 'deal_id')} * 2)"
+        for status, _, ratings, _ in WATCHLIST_PROFILE
+    ) + " END"
+    discount_case = "CASE d.watchlist " + " ".join(
+        f"WHEN {sql_literal(status)} THEN {discount}" for status, _, _, discount in WATCHLIST_PROFILE
+    ) + " END"
+    facilities = "\n            ".join(
+        f"{'UNION ALL SELECT' if index else 'SELECT'} {index}, {sql_literal(facility)}, {sql_literal(security)}"
+        for index, (facility, security) in enumerate(FACILITIES)
+    )
+
+    def uniform_between(bounds, kind, *columns):
+        return f"({bounds[0]} + {bounds[1] - bounds[0]} * {sql_uniform(seed, kind, *columns)})"
+
+    body = f"""
+-- ============================================================================
+-- DIMENSIONS
+-- ============================================================================
+
+INSERT INTO DIM_DATE
+SELECT
+    TO_NUMBER(TO_CHAR(date_val, 'YYYYMMDD')),
+    date_val,
+    YEAR(date_val),
+    QUARTER(date_val),
+    MONTH(date_val),
+    DAY(date_val),
+    LAST_DAY(date_val),
+    date_val = LAST_DAY(date_val)
+FROM (SELECT DATEADD(day, id - 1, {start}::DATE) AS date_val FROM {sql_sequence(calendar_days)});
+
+INSERT INTO DIM_COMPANY (company_id, company_name, industry, region)
+VALUES {fixed_companies};
+
+INSERT INTO DIM_COMPANY (company_id, company_name, industry, region)
+SELECT
+    id,
+    'Portfolio Company ' || LPAD(id, 6, '0'),
+    {sql_pick(INDUSTRIES, sql_uniform(seed, 'industry', 'id'))},
+    {sql_pick(REGIONS, sql_uniform(seed, 'region', 'id'))}
+FROM {sql_sequence(spec.companies)}
+WHERE id > {len(FIXED_COMPANIES)};
+
+INSERT INTO DIM_SPONSOR (sponsor_id, sponsor_name, sponsor_type)
+SELECT
+    id,
+    'Sponsor Partners ' || LPAD(id, 5, '0'),
+    {sql_pick(SPONSOR_TYPES, sql_uniform(seed, 'sponsor_type', 'id'))}
+FROM {sql_sequence(spec.sponsors)};
+
+INSERT INTO DIM_FUND (fund_id, fund_name, fund_family, strategy_type, vintage_year)
+VALUES {fixed_funds};
+
+INSERT INTO DIM_FUND (fund_id, fund_name, fund_family, strategy_type, vintage_year)
+SELECT
+    id,
+    'Credit Fund ' || LPAD(id, 5, '0'),
+    'Fund Family ' || LPAD(MOD(id, 50), 2, '0'),
+    {sql_pick(STRATEGIES, sql_uniform(seed, 'strategy', 'id'))},
+    2018 + FLOOR({sql_uniform(seed, 'vintage', 'id')} * 7)
+FROM {sql_sequence(spec.funds)}
+WHERE id > {len(FIXED_FUNDS)};
+
+INSERT INTO DIM_DEAL (deal_id, deal_name, company_id, deal_date, watchlist, rating, originator1, preparer)
+SELECT
+    deal_id,
+    'Credit Facility ' || LPAD(deal_id, 6, '0'),
+    MOD(deal_id - 1, {spec.companies}) + 1,
+    deal_date,
+    watchlist,
+    {rating_case},
+    ARRAY_CONSTRUCT({', '.join(sql_literal(o) for o in ORIGINATORS)})[MOD(deal_id - 1, {len(ORIGINATORS)})]::VARCHAR,
+    {sql_pick(PREPARERS, sql_uniform(seed, 'preparer', 'deal_id'))}
+FROM (
+    SELECT
+        id AS deal_id,
+        DATEADD(day, FLOOR({sql_uniform(seed, 'deal_date', 'id')} * (DATEDIFF(day, {start}, {end}) + 730)) - 730, {start}::DATE) AS deal_date,
+        {watchlist_case} AS watchlist
+    FROM {sql_sequence(spec.deals)}
+);
+
+INSERT INTO DIM_ASSET (asset_id, asset_name, deal_id, facility_type, security_type, maturity_date)
+SELECT
+    (d.deal_id - 1) * {spec.assets_per_deal} + slots.id,
+    d.deal_name || ' - ' || f.facility_type,
+    d.deal_id,
+    f.facility_type,
+    f.security_type,
+    DATEADD(year, 5, d.deal_date)
+FROM DIM_DEAL d
+CROSS JOIN {sql_sequence(spec.assets_per_deal)} slots
+JOIN (
+            {facilities}
+) AS f(slot, facility_type, security_type)
+    ON f.slot = MOD(slots.id - 1, {len(FACILITIES)});
+
+-- ============================================================================
+-- FACT_POSITION_SNAPSHOT
+-- ============================================================================
+
+INSERT INTO FACT_POSITION_SNAPSHOT
+WITH snap_dates AS (
+    SELECT
+        date_key,
+        DATEDIFF(day, {start}, calendar_date) / {DAYS_PER_MONTH} AS months_since_start
+    FROM DIM_DATE
+    WHERE calendar_date BETWEEN {start} AND {end}
+      AND {density}
+),
+asset_profiles AS (
+    SELECT
+        a.asset_id,
+        a.deal_id,
+        d.company_id,
+        1 + FLOOR({sql_uniform(seed, 'fund', 'a.asset_id')} * {spec.funds}) AS fund_id,
+        1 + FLOOR({sql_uniform(seed, 'sponsor', 'a.asset_id')} * {spec.sponsors}) AS sponsor_id,
+        {uniform_between(COMMITMENT_RANGE, 'commitment', 'a.asset_id')} AS commitment0,
+        {uniform_between(FUNDED_RATIO_RANGE, 'funded', 'a.asset_id')} AS funded0,
+        {uniform_between(MARK_RANGE, 'mark', 'a.asset_id')} - {discount_case} AS mark0,
+        {uniform_between(COST_RATIO_RANGE, 'cost', 'a.asset_id')} AS cost_ratio
+    FROM DIM_ASSET a
+    JOIN DIM_DEAL d ON a.deal_id = d.deal_id
+),
+positions AS (
+    SELECT
+        s.date_key,
+        p.*,
+        ROUND(p.commitment0 * (1 + {COMMITMENT_MONTHLY_GROWTH} * s.months_since_start), 2) AS commitment,
+        LEAST({FUNDED_RATIO_CAP}, p.funded0 + {FUNDED_RATIO_MONTHLY_DRAW} * s.months_since_start) AS funded_ratio,
+        ROUND(LEAST({MARK_BOUNDS[1]}, GREATEST({MARK_BOUNDS[0]},
+            p.mark0 + {MARK_NOISE} * ({sql_uniform(seed, 'mark_noise', 'p.asset_id', 's.date_key')} - 0.5))), 4) AS mark
+    FROM snap_dates s
+    CROSS JOIN asset_profiles p
+),
+drawn AS (
+    SELECT *, ROUND(commitment * funded_ratio, 2) AS funded_par
+    FROM positions
+),
+measured AS (
+    SELECT *, funded_par + ROUND((commitment - funded_par) * {UNDRAWN_CCF}, 2) AS exposure
+    FROM drawn
+)
+SELECT
+    ROW_NUMBER() OVER (ORDER BY date_key, asset_id),
+    date_key,
+    company_id,
+    deal_id,
+    asset_id,
+    fund_id,
+    sponsor_id,
+    exposure,
+    commitment,
+    ROUND(exposure * mark, 2),
+    funded_par,
+    commitment - funded_par,
+    ROUND(funded_par * cost_ratio, 2),
+    mark
+FROM measured
+-- Insert in date order so micro-partitions line up with the date_id clustering key
+ORDER BY date_key, asset_id;
+"""
+    header = SQL_HEADER.format(
+        script="generate_load_test.sql",
+        purpose="Generate a synthetic load-test dataset server-side with GENERATOR.",
+        parameters=sql_parameters(spec),
+    )
+    return header + body + SQL_VALIDATION
+
+
+def render_load_sql(spec, file_format, out_dir):
+    """PUT + COPY script for locally generated files."""
+    stage = "SFE_LOAD_TEST_STAGE"
+    if file_format == "csv":
+        format_options = "TYPE = CSV SKIP_HEADER = 1 FIELD_OPTIONALLY_ENCLOSED_BY = '\"'"
+        copy_options = ""
+    else:
+        format_options = "TYPE = PARQUET"
+        copy_options = " MATCH_BY_COLUMN_NAME = CASE_INSENSITIVE"
+    lines = [
+        SQL_HEADER.format(
+            script="load.sql",
+            purpose=f"Load the {file_format.upper()} files in this directory via PUT and COPY INTO.",
+            parameters=sql_parameters(spec),
+        ),
+        f"CREATE TEMPORARY STAGE {stage} FILE_FORMAT = ({format_options});",
+        "",
+    ]
+    for table, _ in TABLES:
+        path = os.path.abspath(os.path.join(out_dir, f"{table}.{file_format}")).replace(os.sep, "/")
+        lines.append(f"PUT 'file://{path}' @{stage}/{table} AUTO_COMPRESS = TRUE;")
+        lines.append(f"COPY INTO {table} FROM @{stage}/{table}{copy_options};")
+        lines.append("")
+    return "\n".join(lines) + SQL_VALIDATION
+
+
+# ============================================================================
+# CLI
+# ============================================================================
+
+def parse_date(text):
+    return date.fromisoformat(text)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help="multiplier on the demo entity counts (default 1)")
+    parser.add_argument("--companies", type=int, help="override the company count")
+    parser.add_argument("--deals", type=int, help="override the deal count")
+    parser.add_argument("--assets-per-deal", type=int, default=DEFAULT_ASSETS_PER_DEAL)
+    parser.add_argument("--funds", type=int, help="override the fund count")
+    parser.add_argument("--sponsors", type=int, help="override the sponsor count")
+    parser.add_argument("--density", choices=["month-end", "daily"], default="month-end",
+                        help="snapshot every day, or every month-end plus the end date")
+    parser.add_argument("--start", type=parse_date, default=date(2024, 1, 1), help="first snapshot date")
+    parser.add_argument("--end", type=parse_date, help="last snapshot date (default today)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--format", choices=["sql", "csv", "parquet"], default="sql")
+    parser.add_argument("--out", help="output directory for csv/parquet, or file for sql (default stdout)")
+    parser.add_argument("--batch-rows", type=int, default=1_000_000, help="parquet row group size")
+    args = parser.parse_args(argv)
+
+    spec = DatasetSpec(
+        scale=args.scale, companies=args.companies, deals=args.deals, assets_per_deal=args.assets_per_deal,
+        funds=args.funds, sponsors=args.sponsors, density=args.density, start=args.start, end=args.end,
+        seed=args.seed,
+    )
+    report = spec.summary()
+
+    if args.format == "sql":
+        script = render_generator_sql(spec)
+        if args.out:
+            with open(args.out, "w", encoding="utf-8") as handle:
+                handle.write(script)
+        else:
+            sys.stdout.write(script)
+    else:
+        if not args.out:
+            parser.error(f"--out is required for {args.format} output")
+        os.makedirs(args.out, exist_ok=True)
+        generator = LocalGenerator(spec)
+        if args.format == "csv":
+            report["rows"] = write_csv(generator, args.out)
+        else:
+            report["rows"] = write_parquet(generator, args.out, args.batch_rows)
+        with open(os.path.join(args.out, "load.sql"), "w", encoding="utf-8") as handle:
+            handle.write(render_load_sql(spec, args.format, args.out))
+
+    print(json.dumps(report, indent=2), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,451 @@
+"""
+Benchmark the dashboard's data loaders offline against a local DuckDB stand-in.
+
+The harness builds the star schema with generate_data.py at each requested
+scale, materializes the dashboard rollups from
+sql/03_transformations/04_create_rollups.sql as plain tables, and runs every
+loader in sql/05_streamlit/app/loaders.py, and the in-app exports in
+export.py, through a session adapter that speaks the Snowpark
+sql(...).to_pandas_batches() / collect() interface.
+Loader code is imported, not copied, so the numbers move when the dashboard's
+code does. The traced_* scenarios repeat a few loaders through the dashboard's
+telemetry.TracedSession wrapper, so overhead added there shows up as the gap
+between a scenario and its traced_ twin.
+
+For each loader and dataset size it records:
+
+  wall_ms      min and median wall time over --repeat runs
+  query_ms     time to execute and fetch the Arrow result
+  convert_ms   Arrow to pandas conversion (the pandas share of wall time)
+  rows         rows transferred from the backend (or rows produced, for
+               in-memory derivations)
+  result_kb    in-memory size of the returned frame (file size, for exports)
+  peak_kb      peak Python allocation during one traced run (tracemalloc;
+               covers pandas/numpy buffers, not DuckDB's own arena)
+
+A scenario that does not apply to a dataset (the next deal page when every
+deal fits on one page, say) is reported as {"skipped": reason} instead.
+
+DuckDB is used rather than SQLite because the snapshot query relies on
+GROUPING SETS. A handful of Snowflake-only expressions are rewritten on the
+way in (see DIALECT_REWRITES), and CURRENT_DATE() is pinned to the latest
+snapshot date so runs are repeatable.
+
+Usage:
+  python benchmarks/loader_bench.py --scales 1 10 100 --report build/loader_bench.json
+  python benchmarks/loader_bench.py --data build/load_100x --report after.json --baseline before.json
+
+Requires duckdb, pandas, numpy and pyarrow.
+"""
+
+import argparse
+import json
+import os
+import platform
+import re
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import date, datetime, timezone
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+REPO = os.path.join(ROOT, os.pardir)
+ROLLUPS_SQL = os.path.join(REPO, "sql", "03_transformations", "04_create_rollups.sql")
+sys.path.insert(0, os.path.join(REPO, "sql", "05_streamlit", "app"))
+
+import duckdb  # noqa: E402
+import pandas as pd  # noqa: E402
+
+import export  # noqa: E402
+import generate_data  # noqa: E402
+import loaders  # noqa: E402
+import telemetry  # noqa: E402
+
+STAR_SCHEMA = [table for table, _ in generate_data.TABLES]
+
+# Snowflake-only expressions and their DuckDB equivalents, applied in order
+DIALECT_REWRITES = [
+    (re.compile(r"SNOWFLAKE_EXAMPLE\.SFE_ANALYTICS_CREDIT\."), lambda m, as_of: ""),
+    (re.compile(r"SYSTEM\$LAST_CHANGE_COMMIT_TIME\('[^']*'\)"), lambda m, as_of: "CAST(0 AS BIGINT)"),
+    (re.compile(r"CURRENT_DATE\(\)"), lambda m, as_of: f"DATE '{as_of.isoformat()}'"),
+    (re.compile(r"TO_NUMBER\(TO_CHAR\((.+?), 'YYYYMMDD'\)\)"),
+     lambda m, as_of: f"CAST(strftime({m.group(1)}, '%Y%m%d') AS BIGINT)"),
+    (re.compile(r"DATEADD\((\w+), (-?\d+), ([\w.]+)\)"),
+     lambda m, as_of: f"({m.group(3)} + INTERVAL ({m.group(2)}) {m.group(1).upper()})"),
+]
+
+
+def translate(statement, as_of):
+    for pattern, replacement in DIALECT_REWRITES:
+        statement = pattern.sub(lambda match: replacement(match, as_of), statement)
+    return statement
+
+
+class Row(tuple):
+    """Positional and by-name access, like snowflake.snowpark.Row."""
+
+    def __new__(cls, names, values):
+        row = super().__new__(cls, values)
+        row._positions = names
+        return row
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            key = self._positions[key]
+        return super().__getitem__(key)
+
+
+class LocalSession:
+    """
+    Minimal Snowpark Session stand-in backed by a DuckDB connection.
+
+    Every executed statement is appended to `calls` with its timings and row
+    count, so the harness can attribute warehouse time to each loader.
+    """
+
+    def __init__(self, connection, as_of):
+        self.connection = connection
+        self.as_of = as_of
+        self.calls = []
+
+    def sql(self, statement, params=None):
+        return LocalResult(self, translate(statement, self.as_of), params or [])
+
+
+class LocalResult:
+    def __init__(self, session, statement, params):
+        self.session = session
+        self.statement = statement
+        self.params = params
+
+    # statement_params (the telemetry wrapper's QUERY_TAG) are accepted and ignored
+
+    def to_pandas(self, statement_params=None):
+        start = time.perf_counter()
+        table = self.session.connection.execute(self.statement, self.params).fetch_arrow_table()
+        fetched = time.perf_counter()
+        frame = table.to_pandas()
+        frame.columns = [column.upper() for column in frame.columns]
+        self._record(fetched - start, time.perf_counter() - fetched, table.num_rows)
+        return frame
+
+    def to_pandas_batches(self, statement_params=None):
+        """
+        Arrow record batches converted one at a time and yielded as they are
+        read, as Snowpark's to_pandas_batches does. Time the consumer spends
+        between batches (writing an export, say) is not counted as query time.
+        """
+        start = time.perf_counter()
+        reader = self.session.connection.execute(self.statement, self.params).fetch_record_batch()
+        convert_seconds = 0.0
+        consumer_seconds = 0.0
+        rows = 0
+        try:
+            for batch in reader:
+                converted = time.perf_counter()
+                frame = batch.to_pandas()
+                frame.columns = [column.upper() for column in frame.columns]
+                convert_seconds += time.perf_counter() - converted
+                rows += batch.num_rows
+                paused = time.perf_counter()
+                try:
+                    yield frame
+                finally:
+                    consumer_seconds += time.perf_counter() - paused
+        finally:
+            # Also recorded when the consumer stops early, as an export at its cap does
+            elapsed = time.perf_counter() - start - consumer_seconds
+            self._record(elapsed - convert_seconds, convert_seconds, rows)
+
+    @property
+    def columns(self):
+        cursor = self.session.connection.execute(f"SELECT * FROM ({self.statement}) LIMIT 0", self.params)
+        return [column[0].upper() for column in cursor.description]
+
+    def collect(self, statement_params=None):
+        start = time.perf_counter()
+        cursor = self.session.connection.execute(self.statement, self.params)
+        names = {column[0].upper(): index for index, column in enumerate(cursor.description)}
+        rows = [Row(names, values) for values in cursor.fetchall()]
+        self._record(time.perf_counter() - start, 0.0, len(rows))
+        return rows
+
+    def _record(self, query_seconds, convert_seconds, rows):
+        self.session.calls.append({"query": query_seconds, "convert": convert_seconds, "rows": rows})
+
+
+# ============================================================================
+# Dataset setup
+# ============================================================================
+
+def dataset_dir(cache_dir, spec):
+    return os.path.join(cache_dir, f"scale_{spec.scale:g}_{spec.density}_seed{spec.seed}")
+
+
+def generate_dataset(cache_dir, scale, density, seed, end):
+    """Write (or reuse) generate_data.py output for one scale; Parquet when pyarrow allows."""
+    spec = generate_data.DatasetSpec(scale=scale, density=density, seed=seed, end=end)
+    out_dir = dataset_dir(cache_dir, spec)
+    if not os.path.exists(os.path.join(out_dir, "load.sql")):
+        os.makedirs(out_dir, exist_ok=True)
+        generator = generate_data.LocalGenerator(spec)
+        generate_data.write_parquet(generator, out_dir, 1_000_000)
+        with open(os.path.join(out_dir, "load.sql"), "w", encoding="utf-8") as handle:
+            handle.write(generate_data.render_load_sql(spec, "parquet", out_dir))
+    return out_dir
+
+
+def sql_path(path):
+    return "'" + os.path.abspath(path).replace("'", "''") + "'"
+
+
+def load_dataset(data_dir):
+    """Load a generate_data.py directory into an in-memory DuckDB and build the rollups."""
+    connection = duckdb.connect(":memory:")
+    for table in STAR_SCHEMA:
+        parquet = os.path.join(data_dir, f"{table}.parquet")
+        if os.path.exists(parquet):
+            source = f"read_parquet({sql_path(parquet)})"
+        else:
+            source = f"read_csv({sql_path(os.path.join(data_dir, f'{table}.csv'))}, header = true)"
+        connection.execute(f"CREATE TABLE {table} AS SELECT * FROM {source}")
+
+    as_of = connection.execute(
+        "SELECT MAX(d.calendar_date) FROM FACT_POSITION_SNAPSHOT f JOIN DIM_DATE d ON f.date_id = d.date_key"
+    ).fetchone()[0]
+    for name, select in read_rollups():
+        connection.execute(f"CREATE TABLE {name} AS {translate(select, as_of)}")
+    return connection, as_of
+
+
+def read_rollups():
+    """(name, SELECT body) for each dynamic table in the rollup script, in dependency order."""
+    with open(ROLLUPS_SQL, encoding="utf-8") as handle:
+        script = handle.read()
+    pattern = re.compile(r"CREATE OR REPLACE DYNAMIC TABLE (\w+).*?\nAS\n(.*?);", re.DOTALL)
+    return pattern.findall(script)
+
+
+# ============================================================================
+# Scenarios
+# ============================================================================
+
+def latest(ctx):
+    """The default as-of date: the latest snapshot's date_id."""
+    return ctx["data_version"]["max_date_id"]
+
+
+def full_history(snapshot_dates):
+    """(first, last) month-end, the Time Series page's default range."""
+    month_ends = loaders.get_month_ends(snapshot_dates)
+    return month_ends[0], month_ends[-1]
+
+
+class SkipScenario(Exception):
+    """Raised by a scenario that does not apply to the dataset; the reason is reported."""
+
+
+def next_deal_page(ctx):
+    cursor = ctx["deal_page"].cursor
+    if cursor is None:
+        raise SkipScenario(f"all deals fit on one page of {loaders.DEAL_PAGE_SIZE}")
+    return loaders.load_deal_page(ctx["session"], latest(ctx), after=cursor)
+
+
+def traced(ctx):
+    """The local session wrapped as app.py wraps the Snowpark session, with a fresh recorder."""
+    return telemetry.TracedSession(ctx["session"], telemetry.Recorder(app_session="bench"))
+
+
+def exported(ctx, statement, params, export_format, session=None):
+    """Write an in-app export, as the Deal Analysis download does, and discard the file."""
+    written = export.write_export(session or ctx["session"], statement, params, export_format)
+    if written is not None:
+        os.remove(written.path)
+    return written
+
+
+def scenarios():
+    """
+    (name, callable) pairs run in order against a shared context dict.
+
+    Each callable receives the context and returns its result; results are
+    stored back under the scenario name so later scenarios can build on them,
+    mirroring how the dashboard threads the data version and snapshot through.
+    """
+    return [
+        ("data_version", lambda ctx: loaders.load_data_version(ctx["session"])),
+        ("data_freshness", lambda ctx: loaders.load_data_freshness(ctx["session"])),
+        ("current_snapshot", lambda ctx: loaders.load_snapshot(ctx["session"], latest(ctx))),
+        ("snapshot_dates", lambda ctx: loaders.load_snapshot_dates(ctx["session"])),
+        ("prior_snapshot", lambda ctx: loaders.load_snapshot(
+            ctx["session"], loaders.to_python(ctx["snapshot_dates"]["DATE_ID"].iloc[-1]))),
+        ("deal_deltas", lambda ctx: loaders.load_deal_deltas(
+            ctx["session"], latest(ctx), loaders.get_prior_month_end(ctx["snapshot_dates"], latest(ctx)))),
+        ("exposure_trend", lambda ctx: loaders.load_exposure_trend(
+            ctx["session"], *full_history(ctx["snapshot_dates"]))),
+        ("top_deals", lambda ctx: loaders.get_top_deals_by_exposure(ctx["current_snapshot"], 10)),
+        ("exposure_by_industry", lambda ctx: loaders.get_exposure_by_industry(ctx["current_snapshot"])),
+        ("deal_originators", lambda ctx: loaders.get_deal_originators(ctx["current_snapshot"])),
+        ("deal_page", lambda ctx: loaders.load_deal_page(ctx["session"], latest(ctx))),
+        ("deal_page_next", next_deal_page),
+        ("filter_deals", lambda ctx: loaders.load_deal_page(
+            ctx["session"], latest(ctx), "Watchlist", "John Williams")),
+        ("deal_summary", lambda ctx: loaders.get_deal_summary(
+            ctx["current_snapshot"], "Watchlist", "John Williams")),
+        ("deal_drilldown", lambda ctx: loaders.load_deal_drilldown(
+            ctx["session"], latest(ctx), loaders.to_python(ctx["deal_page"].deals["DEAL_ID"].iloc[0]))),
+        ("changed_deals", lambda ctx: loaders.get_changed_deals(ctx["deal_deltas"], "COMMITMENT", 0.02)),
+        ("export_deals_csv", lambda ctx: exported(
+            ctx, loaders.DEAL_EXPORT_SQL, loaders.deal_export_params(latest(ctx)), "CSV")),
+        ("export_positions_parquet", lambda ctx: exported(
+            ctx, loaders.POSITION_EXPORT_SQL, loaders.position_export_params(latest(ctx)), "Parquet")),
+        ("traced_current_snapshot", lambda ctx: loaders.load_snapshot(traced(ctx), latest(ctx))),
+        ("traced_deal_page", lambda ctx: loaders.load_deal_page(traced(ctx), latest(ctx))),
+        ("traced_export_deals_csv", lambda ctx: exported(
+            ctx, loaders.DEAL_EXPORT_SQL, loaders.deal_export_params(latest(ctx)), "CSV", traced(ctx))),
+    ]
+
+
+def result_size(result):
+    if isinstance(result, (loaders.Snapshot, loaders.DealPage)):
+        result = result.deals
+    if isinstance(result, loaders.DealDrilldown):
+        result = result.holders
+    if isinstance(result, export.ExportFile):
+        return result.rows, result.size
+    if isinstance(result, pd.DataFrame):
+        return len(result), int(result.memory_usage(deep=True).sum())
+    if isinstance(result, (list, dict)):
+        return len(result), sys.getsizeof(result)
+    return 1, sys.getsizeof(result)
+
+
+def measure(name, fn, context, repeat):
+    session = context["session"]
+    walls, query, convert = [], [], []
+    rows = None
+    for _ in range(repeat):
+        session.calls.clear()
+        start = time.perf_counter()
+        result = fn(context)
+        walls.append(time.perf_counter() - start)
+        query.append(sum(call["query"] for call in session.calls))
+        convert.append(sum(call["convert"] for call in session.calls))
+        if session.calls:
+            rows = sum(call["rows"] for call in session.calls)
+
+    tracemalloc.start()
+    fn(context)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    produced, size = result_size(result)
+    context[name] = result
+    return {
+        "wall_ms_min": min(walls) * 1e3,
+        "wall_ms_median": statistics.median(walls) * 1e3,
+        "query_ms": statistics.median(query) * 1e3,
+        "convert_ms": statistics.median(convert) * 1e3,
+        "rows": rows if rows is not None else produced,
+        "result_kb": size / 1024,
+        "peak_kb": peak / 1024,
+    }
+
+
+def run_dataset(data_dir, repeat):
+    start = time.perf_counter()
+    connection, as_of = load_dataset(data_dir)
+    load_seconds = time.perf_counter() - start
+    fact_rows = connection.execute("SELECT COUNT(*) FROM FACT_POSITION_SNAPSHOT").fetchone()[0]
+    deals = connection.execute("SELECT COUNT(*) FROM DIM_DEAL").fetchone()[0]
+
+    context = {"session": LocalSession(connection, as_of)}
+    results = {}
+    for name, fn in scenarios():
+        try:
+            results[name] = measure(name, fn, context, repeat)
+        except SkipScenario as skip:
+            results[name] = {"skipped": str(skip)}
+    connection.close()
+    return {
+        "dataset": os.path.basename(os.path.normpath(data_dir)),
+        "as_of": as_of.isoformat(),
+        "fact_rows": fact_rows,
+        "deals": deals,
+        "load_seconds": load_seconds,
+        "loaders": results,
+    }
+
+
+def compare(report, baseline):
+    """Print median wall-time ratios against a previous report, matched by dataset and loader."""
+    previous = {(run["dataset"], name): stats
+                for run in baseline["runs"] for name, stats in run["loaders"].items()}
+    print(f"{'dataset':<32} {'loader':<24} {'before_ms':>10} {'after_ms':>10} {'ratio':>7}")
+    for run in report["runs"]:
+        for name, stats in run["loaders"].items():
+            before = previous.get((run["dataset"], name))
+            if before is None or "skipped" in before or "skipped" in stats:
+                continue
+            ratio = stats["wall_ms_median"] / before["wall_ms_median"] if before["wall_ms_median"] else float("nan")
+            print(f"{run['dataset']:<32} {name:<24} {before['wall_ms_median']:>10.2f} "
+                  f"{stats['wall_ms_median']:>10.2f} {ratio:>7.2f}")
+
+
+def environment():
+    import numpy
+    import pyarrow
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "duckdb": duckdb.__version__,
+        "pandas": pd.__version__,
+        "numpy": numpy.__version__,
+        "pyarrow": pyarrow.__version__,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", type=float, nargs="+", default=[1, 10, 100],
+                        help="generate_data.py --scale values to benchmark")
+    parser.add_argument("--data", nargs="+", help="existing generate_data.py csv/parquet directories instead")
+    parser.add_argument("--density", choices=["month-end", "daily"], default="month-end")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--end", type=date.fromisoformat, default=date(2025, 12, 31),
+                        help="last snapshot date; fixed so reports are comparable")
+    parser.add_argument("--cache-dir", default=os.path.join(REPO, "build", "loader_bench"),
+                        help="where generated datasets are kept between runs")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--report", help="write the JSON report here (default stdout)")
+    parser.add_argument("--baseline", help="previous report to compare against")
+    args = parser.parse_args(argv)
+
+    data_dirs = args.data or [
+        generate_dataset(args.cache_dir, scale, args.density, args.seed, args.end) for scale in args.scales
+    ]
+    report = {
+        "generated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "environment": environment(),
+        "repeat": args.repeat,
+        "runs": [run_dataset(data_dir, args.repeat) for data_dir in data_dirs],
+    }
+
+    text = json.dumps(report, indent=2)
+    if args.report:
+        os.makedirs(os.path.dirname(os.path.abspath(args.report)), exist_ok=True)
+        with open(args.report, "w", encoding="utf-8") as handle:
+            handle.write(text)
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as handle:
+            compare(report, json.load(handle))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
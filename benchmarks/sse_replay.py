@@ -0,0 +1,197 @@
+"""
+Replay recorded Cortex Agent streams through the dashboard's SSE decoder.
+
+Two modes, both offline:
+
+  check  Replays every fixture in benchmarks/fixtures through a local stub
+         HTTP server at several chunk sizes (1 byte up to whole-stream) and
+         compares the decoded text, thread/message IDs, tool calls and tables
+         with fixtures/expected.json. Exits non-zero on any mismatch.
+
+  bench  Synthesizes a long answer of --tokens text deltas and measures the
+         decoder's per-token overhead in-process and end to end through the
+         stub server. Results are printed as JSON.
+
+Usage:
+  python benchmarks/sse_replay.py check
+  python benchmarks/sse_replay.py bench --tokens 20000 --chunk-size 512
+"""
+
+import argparse
+import http.client
+import http.server
+import json
+import os
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+FIXTURES = os.path.join(ROOT, "fixtures")
+sys.path.insert(0, os.path.join(ROOT, os.pardir, "sql", "05_streamlit", "app"))
+
+from sse import AgentStreamReader  # noqa: E402
+
+CHECK_CHUNK_SIZES = [1, 2, 7, 64, 1 << 20]
+
+
+class StubAgentServer(http.server.ThreadingHTTPServer):
+    """Serves one canned SSE body per request using chunked transfer encoding."""
+
+    daemon_threads = True
+
+    def __init__(self, body, chunk_size):
+        super().__init__(("127.0.0.1", 0), StubAgentHandler)
+        self.body = body
+        self.chunk_size = chunk_size
+
+    def __enter__(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
+
+
+class StubAgentHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        body, size = self.server.body, self.server.chunk_size
+        for start in range(0, len(body), size):
+            piece = body[start:start + size]
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(piece), piece))
+        self.wfile.write(b"0\r\n\r\n")
+
+    def log_message(self, *args):
+        pass
+
+
+def iter_stub_response(server, read_size=8192):
+    """POST to the stub and yield body bytes as they arrive, like iter_content."""
+    connection = http.client.HTTPConnection(*server.server_address)
+    connection.request("POST", "/agents/CREDIT_PORTFOLIO_ANALYST:run", body=b"{}",
+                       headers={"Content-Type": "application/json", "Accept": "text/event-stream"})
+    response = connection.getresponse()
+    try:
+        while True:
+            chunk = response.read1(read_size)
+            if not chunk:
+                break
+            yield chunk
+    finally:
+        connection.close()
+
+
+def replay(body, chunk_size):
+    reader = AgentStreamReader()
+    with StubAgentServer(body, chunk_size) as server:
+        deltas = list(reader.iter_text(iter_stub_response(server)))
+    return reader, deltas
+
+
+def summarize(reader):
+    return {
+        "text": reader.text,
+        "thread_id": reader.thread_id,
+        "message_id": reader.message_id,
+        "tool_uses": len(reader.tool_uses),
+        "tables": len(reader.tables),
+    }
+
+
+def run_check():
+    with open(os.path.join(FIXTURES, "expected.json"), encoding="utf-8") as handle:
+        expected = json.load(handle)
+
+    failures = 0
+    for name, want in sorted(expected.items()):
+        with open(os.path.join(FIXTURES, name), "rb") as handle:
+            body = handle.read()
+        fixture_failures = 0
+        for chunk_size in CHECK_CHUNK_SIZES:
+            reader, deltas = replay(body, chunk_size)
+            got = summarize(reader)
+            if got != want or "".join(deltas) != want["text"]:
+                fixture_failures += 1
+                print(f"FAIL {name} chunk_size={chunk_size}\n  want {want}\n  got  {got}")
+        if not fixture_failures:
+            print(f"ok   {name}")
+        failures += fixture_failures
+    return 1 if failures else 0
+
+
+def synthetic_stream(tokens):
+    """Build a long answer: one metadata event, `tokens` text deltas, then done."""
+    parts = [b'event: metadata\ndata: {"metadata": {"role": "assistant", "message_id": 1}}\n\n']
+    delta = b'event: response.text.delta\ndata: {"content_index": 0, "text": "token%d "}\n\n'
+    parts.extend(delta % i for i in range(tokens))
+    parts.append(b"event: done\ndata: [DONE]\n\n")
+    return b"".join(parts)
+
+
+def run_bench(tokens, chunk_size, repeat):
+    body = synthetic_stream(tokens)
+    chunks = [body[i:i + chunk_size] for i in range(0, len(body), chunk_size)]
+
+    in_process = []
+    for _ in range(repeat):
+        reader = AgentStreamReader()
+        start = time.perf_counter()
+        for _ in reader.iter_text(chunks):
+            pass
+        in_process.append(time.perf_counter() - start)
+
+    end_to_end = []
+    first_token = []
+    for _ in range(repeat):
+        reader = AgentStreamReader()
+        with StubAgentServer(body, chunk_size) as server:
+            start = time.perf_counter()
+            stream = reader.iter_text(iter_stub_response(server))
+            next(stream)
+            first_token.append(time.perf_counter() - start)
+            for _ in stream:
+                pass
+            end_to_end.append(time.perf_counter() - start)
+
+    best = min(in_process)
+    report = {
+        "tokens": tokens,
+        "bytes": len(body),
+        "chunk_size": chunk_size,
+        "repeat": repeat,
+        "decode_seconds": best,
+        "decode_us_per_token": best / tokens * 1e6,
+        "decode_mb_per_second": len(body) / best / 1e6,
+        "end_to_end_seconds": min(end_to_end),
+        "time_to_first_token_ms": min(first_token) * 1e3,
+        "text_chars": len(reader.text),
+    }
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="mode", required=True)
+    sub.add_parser("check", help="verify fixtures decode correctly at every chunking")
+    bench = sub.add_parser("bench", help="measure per-token decode overhead")
+    bench.add_argument("--tokens", type=int, default=20000)
+    bench.add_argument("--chunk-size", type=int, default=512)
+    bench.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    if args.mode == "check":
+        return run_check()
+    return run_bench(args.tokens, args.chunk_size, args.repeat)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
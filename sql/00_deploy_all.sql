@@ -22,9 +22,9 @@
  *   Phase 2: Schemas + Warehouse
  *   Phase 3: Star schema tables
  *   Phase 4: Synthetic data
- *   Phase 5: Helper views
- *   Phase 6: Semantic view + Agent
- *   Phase 7: Streamlit app
+ *   Phase 5: Helper views + dashboard rollups
+ *   Phase 6: Semantic view + Agent + answer cache
+ *   Phase 7: Streamlit app + post-load pre-warm task + export stage
  *
  * WHAT GETS CREATED:
  *   - Database: SNOWFLAKE_EXAMPLE (if not exists)
@@ -33,8 +33,13 @@
  *   - Git: SFE_CAPITOLKINGS_REPO (code repository mirror)
  *   - Dimensions: DIM_DATE, DIM_COMPANY, DIM_DEAL, DIM_ASSET, DIM_FUND, DIM_SPONSOR
  *   - Fact: FACT_POSITION_SNAPSHOT
+ *   - Rollups: DT_DEAL_DAILY, DT_SNAPSHOT_DATES, DT_PORTFOLIO_MONTH_END, DT_DEAL_DELTAS (dynamic tables)
  *   - Semantic View: SV_CREDIT_PORTFOLIO_OVERVIEW (owned by SYSADMIN)
  *   - Agent: CREDIT_PORTFOLIO_ANALYST
+ *   - Answer cache: AGENT_ANSWER_CACHE
+ *   - Telemetry: DASHBOARD_TELEMETRY
+ *   - Pre-warm: FACT_POSITION_SNAPSHOT_LOADS (stream), SP_PREWARM_DASHBOARD, TASK_PREWARM_DASHBOARD
+ *   - Exports: SFE_DASHBOARD_EXPORTS (stage)
  *   - Streamlit: SFE_CREDIT_PORTFOLIO_APP
  *
  * CLEANUP:
@@ -156,7 +161,10 @@ SELECT '✅ Synthetic data loaded (HealthTech Solutions, ACME, John Williams con
 -- Create convenience views over star schema
 EXECUTE IMMEDIATE FROM @SNOWFLAKE_EXAMPLE.GIT_REPOS.SFE_CAPITOLKINGS_REPO/branches/main/sql/03_transformations/03_create_views.sql;
 
-SELECT '✅ Helper views created' AS phase_5_status;
+-- Create incrementally refreshed rollups backing the Streamlit dashboard
+EXECUTE IMMEDIATE FROM @SNOWFLAKE_EXAMPLE.GIT_REPOS.SFE_CAPITOLKINGS_REPO/branches/main/sql/03_transformations/04_create_rollups.sql;
+
+SELECT '✅ Helper views and dashboard rollups created' AS phase_5_status;
 
 -- ============================================================================
 -- PHASE 6: Cortex Intelligence Layer
@@ -168,6 +176,9 @@ EXECUTE IMMEDIATE FROM @SNOWFLAKE_EXAMPLE.GIT_REPOS.SFE_CAPITOLKINGS_REPO/branch
 -- Create Cortex Agent with 6 sample questions
 EXECUTE IMMEDIATE FROM @SNOWFLAKE_EXAMPLE.GIT_REPOS.SFE_CAPITOLKINGS_REPO/branches/main/sql/04_cortex/04_create_agent.sql;
 
+-- Create shared answer cache for repeated agent questions
+EXECUTE IMMEDIATE FROM @SNOWFLAKE_EXAMPLE.GIT_REPOS.SFE_CAPITOLKINGS_REPO/branches/main/sql/04_cortex/03_create_answer_cache.sql;
+
 SELECT '✅ Cortex Intelligence layer deployed (semantic view + agent)' AS phase_6_status;
 
 -- ============================================================================
@@ -177,6 +188,15 @@ SELECT '✅ Cortex Intelligence layer deployed (semantic view + agent)' AS phase
 -- Create Streamlit in Snowflake application
 EXECUTE IMMEDIATE FROM @SNOWFLAKE_EXAMPLE.GIT_REPOS.SFE_CAPITOLKINGS_REPO/branches/main/sql/05_streamlit/01_create_streamlit.sql;
 
+-- Create telemetry table for dashboard latency instrumentation
+EXECUTE IMMEDIATE FROM @SNOWFLAKE_EXAMPLE.GIT_REPOS.SFE_CAPITOLKINGS_REPO/branches/main/sql/05_streamlit/02_create_telemetry_table.sql;
+
+-- Create post-load cache pre-warming (stream + procedure + task) and warm once
+EXECUTE IMMEDIATE FROM @SNOWFLAKE_EXAMPLE.GIT_REPOS.SFE_CAPITOLKINGS_REPO/branches/main/sql/05_streamlit/03_create_prewarm_task.sql;
+
+-- Create stage for large dashboard exports
+EXECUTE IMMEDIATE FROM @SNOWFLAKE_EXAMPLE.GIT_REPOS.SFE_CAPITOLKINGS_REPO/branches/main/sql/05_streamlit/04_create_export_stage.sql;
+
 SELECT '✅ Streamlit dashboard deployed' AS phase_7_status;
 
 -- ============================================================================
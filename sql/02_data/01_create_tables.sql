@@ -109,4 +109,8 @@ CREATE OR REPLACE TABLE FACT_POSITION_SNAPSHOT (
     unfunded_par        NUMBER(15,2)  NOT NULL COMMENT 'Unfunded commitment amount in USD',
     cost                NUMBER(15,2)  COMMENT 'Cost basis in USD',
     mark                NUMBER(6,4)   COMMENT 'Pricing mark as decimal (e.g., 1.0000 = par)'
-) COMMENT = 'DEMO: credit-portfolio - Daily portfolio position snapshots with financial metrics | Author: SE Community | Expires: 2025-12-21';
+)
+-- Every consumer filters on a single snapshot date, so cluster on date_id to let
+-- Snowflake prune to that day's micro-partitions as the history grows
+CLUSTER BY (date_id)
+COMMENT = 'DEMO: credit-portfolio - Daily portfolio position snapshots with financial metrics | Author: SE Community | Expires: 2025-12-21';
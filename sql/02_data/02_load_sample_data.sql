@@ -321,7 +321,9 @@ CROSS JOIN (
 ) funds
 CROSS JOIN (
     SELECT sponsor_id FROM DIM_SPONSOR ORDER BY RANDOM() LIMIT 1
-) sponsors;
+) sponsors
+-- Insert in date order so micro-partitions line up with the date_id clustering key
+ORDER BY snap_dates.date_key, assets.asset_id;
 
 -- ============================================================================
 -- VALIDATION QUERIES
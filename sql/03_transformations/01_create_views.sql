@@ -43,7 +43,8 @@ JOIN DIM_COMPANY companies ON f.company_id = companies.company_id
 JOIN DIM_DEAL deals ON f.deal_id = deals.deal_id
 JOIN DIM_FUND funds ON f.fund_id = funds.fund_id
 JOIN DIM_DATE dates ON f.date_id = dates.date_key
-WHERE dates.calendar_date = CURRENT_DATE()
+-- Filter the clustering key directly so only today's micro-partitions are scanned
+WHERE f.date_id = TO_NUMBER(TO_CHAR(CURRENT_DATE(), 'YYYYMMDD'))
 GROUP BY 
     companies.company_name,
     deals.deal_name,
@@ -74,7 +75,7 @@ JOIN DIM_DEAL deals ON f.deal_id = deals.deal_id
 JOIN DIM_COMPANY companies ON f.company_id = companies.company_id
 JOIN DIM_DATE dates ON f.date_id = dates.date_key
 WHERE deals.watchlist IN ('Watchlist', 'Intensive Care')
-  AND dates.calendar_date = CURRENT_DATE()
+  AND f.date_id = TO_NUMBER(TO_CHAR(CURRENT_DATE(), 'YYYYMMDD'))
 GROUP BY 
     deals.deal_name,
     companies.company_name,
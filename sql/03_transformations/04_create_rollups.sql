@@ -0,0 +1,190 @@
+/*******************************************************************************
+ * DEMO PROJECT: Capitol Kings Credit Portfolio Demo
+ * Script: 03_transformations/04_create_rollups.sql
+ *
+ * PURPOSE:
+ *   Materialize the aggregates the Streamlit dashboard reads so page views
+ *   no longer re-aggregate raw position snapshots. Dynamic tables refresh
+ *   incrementally as new snapshots land, so dashboard query cost tracks the
+ *   number of deals rather than the size of the fact history.
+ *
+ * OBJECTS CREATED:
+ *   - DT_DEAL_DAILY           (deal x snapshot date)
+ *   - DT_SNAPSHOT_DATES       (snapshot date)
+ *   - DT_PORTFOLIO_MONTH_END  (portfolio x month-end)
+ *   - DT_DEAL_DELTAS          (deal x snapshot date x anchor date)
+ *
+ * NOTES:
+ *   - Marks are stored as SUM/COUNT pairs so averages stay exact when the
+ *     rollups are re-aggregated (AVG of AVGs would weight deals equally).
+ *   - The other rollups read DT_DEAL_DAILY, so the fact table is only
+ *     scanned by one refresh pipeline.
+ *   - DT_SNAPSHOT_DATES holds one row per date with positions, so the as-of
+ *     selector reads a few hundred rows instead of every deal row.
+ *   - DT_DEAL_DELTAS pairs each snapshot date only with the anchors a change
+ *     question uses: the previous snapshot, the prior month-end and the
+ *     quarter-ends of the trailing 24 months. That is at most 10 anchors per
+ *     date, so the table grows linearly with the snapshot history (pairing
+ *     every earlier date would grow quadratically), and a change question
+ *     becomes one lookup on (date_id, anchor_date_id).
+ *
+ * CLEANUP:
+ *   See sql/99_cleanup/teardown_all.sql
+ ******************************************************************************/
+
+USE ROLE ACCOUNTADMIN;
+USE DATABASE SNOWFLAKE_EXAMPLE;
+USE SCHEMA SFE_ANALYTICS_CREDIT;
+
+-- Rollup 1: Deal x Date
+-- One row per deal per snapshot date with deal and company attributes denormalized
+CREATE OR REPLACE DYNAMIC TABLE DT_DEAL_DAILY
+  TARGET_LAG = '1 hour'
+  WAREHOUSE = SFE_CREDIT_PORTFOLIO_WH
+  REFRESH_MODE = INCREMENTAL
+  CLUSTER BY (date_id)
+  COMMENT = 'DEMO: credit-portfolio - Deal-level daily rollup of position snapshots | Author: SE Community | Expires: 2025-12-21'
+AS
+SELECT
+    f.date_id,
+    dates.calendar_date,
+    dates.month_end_date,
+    dates.is_month_end,
+    f.deal_id,
+    deals.deal_name,
+    f.company_id,
+    companies.company_name,
+    companies.industry,
+    deals.watchlist,
+    deals.rating,
+    deals.originator1,
+    deals.deal_date,
+    SUM(f.exposure) AS total_exposure,
+    SUM(f.commitment) AS total_commitment,
+    SUM(f.fair_value) AS total_fair_value,
+    SUM(f.funded_par) AS total_funded_par,
+    SUM(f.unfunded_par) AS total_unfunded_par,
+    SUM(f.mark) AS mark_sum,
+    COUNT(f.mark) AS mark_count,
+    COUNT(*) AS position_count
+FROM FACT_POSITION_SNAPSHOT f
+JOIN DIM_DEAL deals ON f.deal_id = deals.deal_id
+JOIN DIM_COMPANY companies ON f.company_id = companies.company_id
+JOIN DIM_DATE dates ON f.date_id = dates.date_key
+GROUP BY
+    f.date_id,
+    dates.calendar_date,
+    dates.month_end_date,
+    dates.is_month_end,
+    f.deal_id,
+    deals.deal_name,
+    f.company_id,
+    companies.company_name,
+    companies.industry,
+    deals.watchlist,
+    deals.rating,
+    deals.originator1,
+    deals.deal_date;
+
+-- Rollup 2: Snapshot Date
+-- One row per snapshot date that has positions, for the as-of date selector
+-- and the DT_DEAL_DELTAS anchors
+CREATE OR REPLACE DYNAMIC TABLE DT_SNAPSHOT_DATES
+  TARGET_LAG = '1 hour'
+  WAREHOUSE = SFE_CREDIT_PORTFOLIO_WH
+  REFRESH_MODE = INCREMENTAL
+  COMMENT = 'DEMO: credit-portfolio - Snapshot dates with positions | Author: SE Community | Expires: 2025-12-21'
+AS
+SELECT
+    date_id,
+    calendar_date,
+    is_month_end,
+    COUNT(*) AS deal_count
+FROM DT_DEAL_DAILY
+GROUP BY date_id, calendar_date, is_month_end;
+
+-- Rollup 3: Portfolio x Month-End
+-- Materialized equivalent of V_MONTHLY_EXPOSURE_TRENDS
+-- (AUTO refresh mode: COUNT(DISTINCT company_id) may fall back to full refresh)
+CREATE OR REPLACE DYNAMIC TABLE DT_PORTFOLIO_MONTH_END
+  TARGET_LAG = '1 hour'
+  WAREHOUSE = SFE_CREDIT_PORTFOLIO_WH
+  REFRESH_MODE = AUTO
+  COMMENT = 'DEMO: credit-portfolio - Month-end portfolio rollup for trend analysis | Author: SE Community | Expires: 2025-12-21'
+AS
+SELECT
+    month_end_date,
+    YEAR(month_end_date) AS year,
+    MONTH(month_end_date) AS month,
+    SUM(total_exposure) AS total_exposure,
+    SUM(total_commitment) AS total_commitment,
+    SUM(total_fair_value) AS total_fair_value,
+    SUM(total_funded_par) AS total_funded_par,
+    SUM(total_unfunded_par) AS total_unfunded_par,
+    SUM(mark_sum) / NULLIF(SUM(mark_count), 0) AS average_mark,
+    COUNT(*) AS deal_count,
+    COUNT(DISTINCT company_id) AS company_count
+FROM DT_DEAL_DAILY
+WHERE is_month_end = TRUE
+GROUP BY month_end_date;
+
+-- Rollup 4: Deal x Date x Anchor Date
+-- Exposure, commitment and fair value changes against each date's anchors
+-- (is_prior_month_end marks the month-over-month anchor). The anchor pairs
+-- are built once over DT_SNAPSHOT_DATES and then equi-joined per
+-- deal. Deals with no position on the anchor date have no row for it.
+-- loaders.get_delta_anchors mirrors these rules for the Deal Changes page.
+CREATE OR REPLACE DYNAMIC TABLE DT_DEAL_DELTAS
+  TARGET_LAG = '1 hour'
+  WAREHOUSE = SFE_CREDIT_PORTFOLIO_WH
+  REFRESH_MODE = AUTO
+  CLUSTER BY (date_id, anchor_date_id)
+  COMMENT = 'DEMO: credit-portfolio - Deal-level changes between snapshot dates | Author: SE Community | Expires: 2025-12-21'
+AS
+WITH anchor_dates AS (
+    -- Previous snapshot
+    SELECT date_id, LAG(date_id) OVER (ORDER BY date_id) AS anchor_date_id
+    FROM DT_SNAPSHOT_DATES
+    QUALIFY anchor_date_id IS NOT NULL
+    UNION
+    -- Prior month-end and trailing quarter-ends
+    SELECT d.date_id, m.date_id AS anchor_date_id
+    FROM DT_SNAPSHOT_DATES d
+    JOIN DT_SNAPSHOT_DATES m
+      ON m.is_month_end
+     AND m.calendar_date < d.calendar_date
+     AND m.calendar_date >= DATEADD(month, -24, d.calendar_date)
+     AND (m.calendar_date = LAST_DAY(DATEADD(month, -1, d.calendar_date))
+          OR MONTH(m.calendar_date) IN (3, 6, 9, 12))
+)
+SELECT
+    cur.date_id,
+    cur.calendar_date,
+    anchor.date_id AS anchor_date_id,
+    anchor.calendar_date AS anchor_date,
+    (anchor.is_month_end AND anchor.calendar_date = LAST_DAY(DATEADD(month, -1, cur.calendar_date))) AS is_prior_month_end,
+    cur.deal_id,
+    cur.deal_name,
+    cur.company_id,
+    cur.company_name,
+    cur.industry,
+    cur.watchlist,
+    cur.originator1,
+    cur.total_exposure AS exposure,
+    anchor.total_exposure AS anchor_exposure,
+    cur.total_exposure - anchor.total_exposure AS exposure_change,
+    (cur.total_exposure - anchor.total_exposure) / NULLIF(anchor.total_exposure, 0) AS exposure_pct_change,
+    cur.total_commitment AS commitment,
+    anchor.total_commitment AS anchor_commitment,
+    cur.total_commitment - anchor.total_commitment AS commitment_change,
+    (cur.total_commitment - anchor.total_commitment) / NULLIF(anchor.total_commitment, 0) AS commitment_pct_change,
+    cur.total_fair_value AS fair_value,
+    anchor.total_fair_value AS anchor_fair_value,
+    cur.total_fair_value - anchor.total_fair_value AS fair_value_change,
+    (cur.total_fair_value - anchor.total_fair_value) / NULLIF(anchor.total_fair_value, 0) AS fair_value_pct_change
+FROM DT_DEAL_DAILY cur
+JOIN anchor_dates pairs ON pairs.date_id = cur.date_id
+JOIN DT_DEAL_DAILY anchor
+  ON anchor.deal_id = cur.deal_id
+ AND anchor.company_id = cur.company_id
+ AND anchor.date_id = pairs.anchor_date_id;
@@ -11,10 +11,14 @@
  * OBJECTS CREATED:
  *   - SNOWFLAKE_EXAMPLE.SEMANTIC_MODELS.SV_CREDIT_PORTFOLIO_OVERVIEW
  *
+ * DEPENDENCIES:
+ *   - DT_DEAL_DELTAS (sql/03_transformations/04_create_rollups.sql) backs the
+ *     change facts used for commitment/exposure change questions
+ *
  * VERIFIED QUERIES (6 business questions):
  *   1. Financial metrics for HealthTech Solutions
  *   2. John Williams's deals in the watchlist
- *   3. Deals with commitment changes >2% (March 31 vs current)
+ *   3. Deals with commitment changes >2% (latest March 31 vs current)
  *   4. Monthly exposure totals for current year
  *   5. Total deal count for ACME
  *   6. Top 10 deals by fair value
@@ -63,7 +67,12 @@ TABLES (
   dates AS SNOWFLAKE_EXAMPLE.SFE_ANALYTICS_CREDIT.DIM_DATE
     PRIMARY KEY (date_key)
     WITH SYNONYMS = ('calendar', 'time dimension')
-    COMMENT = 'Date dimension for time-based analysis'
+    COMMENT = 'Date dimension for time-based analysis',
+  
+  deal_deltas AS SNOWFLAKE_EXAMPLE.SFE_ANALYTICS_CREDIT.DT_DEAL_DELTAS
+    PRIMARY KEY (deal_id, company_id, date_id, anchor_date_id)
+    WITH SYNONYMS = ('deal changes', 'period-over-period changes', 'commitment changes', 'variance')
+    COMMENT = 'Precomputed deal-level changes between each snapshot date and its anchors: the previous snapshot, the prior month-end and the quarter-ends of the trailing 24 months'
 )
 
 RELATIONSHIPS (
@@ -72,7 +81,8 @@ RELATIONSHIPS (
   facts(asset_id) REFERENCES assets(asset_id),
   facts(fund_id) REFERENCES funds(fund_id),
   facts(sponsor_id) REFERENCES sponsors(sponsor_id),
-  facts(date_id) REFERENCES dates(date_key)
+  facts(date_id) REFERENCES dates(date_key),
+  deal_deltas(deal_id) REFERENCES deals(deal_id)
 )
 
 FACTS (
@@ -102,7 +112,32 @@ FACTS (
   
   facts.mark AS mark
     WITH SYNONYMS = ('pricing mark', 'price', 'valuation mark', 'mark to market')
-    COMMENT = 'Pricing mark as decimal (1.0000 = par). Aggregate via AVG to get portfolio average mark.'
+    COMMENT = 'Pricing mark as decimal (1.0000 = par). Aggregate via AVG to get portfolio average mark.',
+  
+  -- Change facts (one row per deal, snapshot date and anchor date)
+  deal_deltas.commitment_change AS commitment_change
+    WITH SYNONYMS = ('commitment delta', 'change in commitment', 'commitment variance')
+    COMMENT = 'Deal commitment on change_date minus commitment on anchor_date, in USD.',
+  
+  deal_deltas.commitment_pct_change AS commitment_pct_change
+    WITH SYNONYMS = ('commitment percent change', 'percentage change in commitment')
+    COMMENT = 'Commitment change as a fraction of the anchor-date commitment (0.02 = 2%).',
+  
+  deal_deltas.exposure_change AS exposure_change
+    WITH SYNONYMS = ('exposure delta', 'change in exposure', 'exposure variance')
+    COMMENT = 'Deal exposure on change_date minus exposure on anchor_date, in USD.',
+  
+  deal_deltas.exposure_pct_change AS exposure_pct_change
+    WITH SYNONYMS = ('exposure percent change', 'percentage change in exposure')
+    COMMENT = 'Exposure change as a fraction of the anchor-date exposure (0.02 = 2%).',
+  
+  deal_deltas.fair_value_change AS fair_value_change
+    WITH SYNONYMS = ('fair value delta', 'change in fair value', 'valuation change')
+    COMMENT = 'Deal fair value on change_date minus fair value on anchor_date, in USD.',
+  
+  deal_deltas.fair_value_pct_change AS fair_value_pct_change
+    WITH SYNONYMS = ('fair value percent change', 'percentage change in fair value')
+    COMMENT = 'Fair value change as a fraction of the anchor-date fair value (0.02 = 2%).'
 )
 
 DIMENSIONS (
@@ -198,7 +233,20 @@ DIMENSIONS (
   
   dates.month AS month
     WITH SYNONYMS = ('calendar month', 'month number')
-    COMMENT = 'Calendar month (1-12)'
+    COMMENT = 'Calendar month (1-12)',
+  
+  -- Change dimensions
+  deal_deltas.calendar_date AS change_date
+    WITH SYNONYMS = ('comparison date', 'current date', 'to date')
+    COMMENT = 'Snapshot date the change is measured at',
+  
+  deal_deltas.anchor_date AS anchor_date
+    WITH SYNONYMS = ('baseline date', 'from date', 'compared to date')
+    COMMENT = 'Earlier snapshot date the change is measured against: previous snapshot, prior month-end or a quarter-end within 24 months (e.g., 2024-03-31)',
+  
+  deal_deltas.is_prior_month_end AS is_prior_month_end
+    WITH SYNONYMS = ('month over month', 'prior month-end anchor')
+    COMMENT = 'TRUE when anchor_date is the month-end before change_date (month-over-month changes)'
 )
 
 METRICS (
@@ -285,36 +333,32 @@ ORDER BY d.deal_date DESC;
 -- Query 3: Deals with commitment changes >2% between March 31 and current
 -- Business Question: "List deals where commitment changed more than 2% between now and March 31st"
 -- Expected: Deals showing meaningful commitment variance
-WITH march_commitments AS (
-    SELECT
-        deal_id,
-        SUM(commitment) AS march_commitment
-    FROM SNOWFLAKE_EXAMPLE.SFE_ANALYTICS_CREDIT.FACT_POSITION_SNAPSHOT f
-    JOIN SNOWFLAKE_EXAMPLE.SFE_ANALYTICS_CREDIT.DIM_DATE d ON f.date_id = d.date_key
-    WHERE d.calendar_date = '2024-03-31'
-    GROUP BY deal_id
+-- Served from DT_DEAL_DELTAS: one pruned lookup on (date_id, anchor_date_id).
+-- The baseline is the latest March 31 before the current snapshot, a
+-- quarter-end within the last 12 months, so it is always one of the anchors
+-- DT_DEAL_DELTAS holds. Older or non-quarter-end baselines need a two-snapshot
+-- diff over DT_DEAL_DAILY instead.
+WITH current_snapshot AS (
+    SELECT MAX(date_id) AS date_id
+    FROM SNOWFLAKE_EXAMPLE.SFE_ANALYTICS_CREDIT.DT_SNAPSHOT_DATES
 ),
-current_commitments AS (
-    SELECT
-        deal_id,
-        SUM(commitment) AS current_commitment
-    FROM SNOWFLAKE_EXAMPLE.SFE_ANALYTICS_CREDIT.FACT_POSITION_SNAPSHOT f
-    JOIN SNOWFLAKE_EXAMPLE.SFE_ANALYTICS_CREDIT.DIM_DATE d ON f.date_id = d.date_key
-    WHERE d.calendar_date = CURRENT_DATE()
-    GROUP BY deal_id
+march_31 AS (
+    SELECT MAX(s.date_id) AS date_id
+    FROM SNOWFLAKE_EXAMPLE.SFE_ANALYTICS_CREDIT.DT_SNAPSHOT_DATES s
+    JOIN current_snapshot c ON s.date_id < c.date_id
+    WHERE s.is_month_end AND MONTH(s.calendar_date) = 3
 )
 SELECT
-    deals.deal_name,
-    companies.company_name,
-    march.march_commitment,
-    curr.current_commitment,
-    curr.current_commitment - march.march_commitment AS commitment_change,
-    ROUND(((curr.current_commitment - march.march_commitment) / march.march_commitment) * 100, 2) AS pct_change
-FROM march_commitments march
-JOIN current_commitments curr ON march.deal_id = curr.deal_id
-JOIN SNOWFLAKE_EXAMPLE.SFE_ANALYTICS_CREDIT.DIM_DEAL deals ON march.deal_id = deals.deal_id
-JOIN SNOWFLAKE_EXAMPLE.SFE_ANALYTICS_CREDIT.DIM_COMPANY companies ON deals.company_id = companies.company_id
-WHERE ABS(((curr.current_commitment - march.march_commitment) / march.march_commitment)) > 0.02
+    deal_name,
+    company_name,
+    anchor_commitment AS march_commitment,
+    commitment AS current_commitment,
+    commitment_change,
+    ROUND(commitment_pct_change * 100, 2) AS pct_change
+FROM SNOWFLAKE_EXAMPLE.SFE_ANALYTICS_CREDIT.DT_DEAL_DELTAS
+WHERE date_id = (SELECT date_id FROM current_snapshot)
+  AND anchor_date_id = (SELECT date_id FROM march_31)
+  AND ABS(commitment_pct_change) > 0.02
 ORDER BY ABS(pct_change) DESC
 LIMIT 20;
 
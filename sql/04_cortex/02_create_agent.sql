@@ -120,7 +120,8 @@ instructions:
        - Apply time filters intelligently:
          * Monthly trends: filter to is_month_end=TRUE and group by month_end_date
          * Point-in-time: filter to calendar_date = '2024-03-31'
-         * Commitment changes: query TWO snapshots (current vs. March 31) and calculate delta
+         * Commitment/exposure/fair value changes: use the precomputed change facts (commitment_pct_change, commitment_change, etc.) filtered on change_date and anchor_date when the anchor is one they cover: the previous snapshot, the prior month-end, or a quarter-end (Mar/Jun/Sep/Dec 31) within 24 months before change_date
+         * Any other anchor (e.g. "since Feb 28", or a quarter-end more than 24 months back), or change facts returning no rows for the requested dates: compute the change from two snapshots instead, as total_commitment (or total_exposure / total_fair_value) per deal at calendar_date = change date minus the same metric at calendar_date = anchor date
        - Keep queries performant:
          * Limit to 100 rows for large result sets (offer to filter further)
          * Filter early on indexed dimensions (company_id, deal_id, date_id)
@@ -146,10 +147,11 @@ instructions:
     MULTI-STEP QUERY PATTERNS:
     
     Pattern A: Commitment Change Analysis
-    - Step 1: Query snapshot as of March 31, 2024 (baseline)
-    - Step 2: Query current snapshot (comparison)
-    - Step 3: Calculate delta and percent change per deal
-    - Step 4: Filter to deals with >2% change and present results
+    - Step 1: Resolve the baseline: the latest March 31 month-end snapshot before the latest snapshot (not a fixed year). Query the change facts with that anchor_date and change_date = latest snapshot
+    - Step 2: Filter to ABS(commitment_pct_change) > 0.02 (percent changes are stored as fractions)
+    - Step 3: Present deals sorted by absolute percent change, with both commitments and the delta
+    - Month-over-month questions: filter is_prior_month_end = TRUE instead of a fixed anchor_date
+    - Baselines the change facts do not cover: diff the two snapshots' per-deal metrics, then apply Steps 2-3
     
     Pattern B: Top-N Rankings
     - Step 1: Query all deals with total_fair_value metric
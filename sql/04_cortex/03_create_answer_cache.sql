@@ -0,0 +1,37 @@
+/*******************************************************************************
+ * DEMO PROJECT: Capitol Kings Credit Portfolio Demo
+ * Script: 04_cortex/03_create_answer_cache.sql
+ *
+ * PURPOSE:
+ *   Shared response cache for first-turn Cortex Agent questions asked from
+ *   the Streamlit dashboard. Each app instance keeps its own in-memory LRU;
+ *   this table lets instances share answers so a sample question is paid
+ *   for once per data version rather than once per container.
+ *
+ * OBJECTS CREATED:
+ *   - SFE_ANALYTICS_CREDIT.AGENT_ANSWER_CACHE
+ *
+ * NOTES:
+ *   - Rows are keyed on (prompt_key, data_version). A new data load changes
+ *     data_version, so stale answers are never served; they can be purged
+ *     with the DELETE at the end of this script.
+ *
+ * CLEANUP:
+ *   See sql/99_cleanup/teardown_all.sql
+ ******************************************************************************/
+
+USE ROLE ACCOUNTADMIN;
+USE DATABASE SNOWFLAKE_EXAMPLE;
+USE SCHEMA SFE_ANALYTICS_CREDIT;
+
+CREATE TABLE IF NOT EXISTS AGENT_ANSWER_CACHE (
+    prompt_key          VARCHAR       NOT NULL COMMENT 'Normalized prompt text (case, whitespace and trailing punctuation folded)',
+    data_version        VARCHAR       NOT NULL COMMENT 'Dashboard data watermark the answer was generated against',
+    answer_text         VARCHAR       NOT NULL COMMENT 'Agent answer as rendered markdown',
+    answer_tables       VARIANT       COMMENT 'Result tables returned with the answer (response.table payloads)',
+    created_at          TIMESTAMP_LTZ NOT NULL DEFAULT CURRENT_TIMESTAMP() COMMENT 'When the answer was cached',
+    hit_count           NUMBER        NOT NULL DEFAULT 0 COMMENT 'Times the answer was served from this table'
+) COMMENT = 'DEMO: credit-portfolio - Shared cache of first-turn Cortex Agent answers | Author: SE Community | Expires: 2025-12-21';
+
+-- Optional housekeeping: drop answers produced against superseded data
+-- DELETE FROM AGENT_ANSWER_CACHE WHERE created_at < DATEADD(day, -1, CURRENT_TIMESTAMP());
@@ -0,0 +1,47 @@
+/*******************************************************************************
+ * DEMO PROJECT: Capitol Kings Credit Portfolio Demo
+ * Script: 05_streamlit/02_create_telemetry_table.sql
+ *
+ * PURPOSE:
+ *   Store per-call latency telemetry from the Streamlit dashboard: one row per
+ *   loader call, warehouse statement and Cortex Agent request. The app writes
+ *   rows in batches (see app/telemetry.py), so slow paths can be found from
+ *   production traffic instead of guessed at.
+ *
+ * OBJECTS CREATED:
+ *   - SFE_ANALYTICS_CREDIT.DASHBOARD_TELEMETRY
+ *
+ * CLEANUP:
+ *   See sql/99_cleanup/teardown_all.sql
+ ******************************************************************************/
+
+USE ROLE ACCOUNTADMIN;
+USE DATABASE SNOWFLAKE_EXAMPLE;
+USE SCHEMA SFE_ANALYTICS_CREDIT;
+
+CREATE TABLE IF NOT EXISTS DASHBOARD_TELEMETRY (
+    event_time          TIMESTAMP_LTZ NOT NULL COMMENT 'When the call started',
+    app_session         VARCHAR       COMMENT 'Streamlit viewer session (random per browser session)',
+    run_id              NUMBER        COMMENT 'Script run number within the viewer session',
+    span                VARCHAR       NOT NULL COMMENT 'Loader or call name (e.g., get_snapshot, cortex_agent)',
+    kind                VARCHAR       NOT NULL COMMENT 'loader, query, agent, export or prewarm',
+    parent              VARCHAR       COMMENT 'Span that issued this statement',
+    query_id            VARCHAR       COMMENT 'Snowflake query ID (join to ACCOUNT_USAGE.QUERY_HISTORY for credits)',
+    wall_ms             FLOAT         COMMENT 'Client-side wall time in milliseconds',
+    server_ms           FLOAT         COMMENT 'Warehouse TOTAL_ELAPSED_TIME in milliseconds',
+    transfer_ms         FLOAT         COMMENT 'Wall time minus server time: result transfer and to_pandas',
+    row_count           NUMBER        COMMENT 'Rows returned',
+    cache_hit           BOOLEAN       COMMENT 'Served from st.cache_data or the agent answer cache',
+    ttft_ms             FLOAT         COMMENT 'Agent time to first streamed token in milliseconds',
+    detail              VARIANT       COMMENT 'Execution, compilation and queue time breakdown'
+)
+CLUSTER BY (TO_DATE(event_time))
+COMMENT = 'DEMO: credit-portfolio - Dashboard per-call latency telemetry | Author: SE Community | Expires: 2025-12-21';
+
+-- Slowest loaders over the last day
+-- SELECT span, COUNT(*) AS calls, COUNT_IF(cache_hit) AS cache_hits,
+--        APPROX_PERCENTILE(wall_ms, 0.5) AS p50_ms, APPROX_PERCENTILE(wall_ms, 0.95) AS p95_ms
+-- FROM DASHBOARD_TELEMETRY
+-- WHERE kind IN ('loader', 'agent') AND event_time >= DATEADD(day, -1, CURRENT_TIMESTAMP())
+-- GROUP BY span
+-- ORDER BY p95_ms DESC;
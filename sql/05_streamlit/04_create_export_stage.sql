@@ -0,0 +1,35 @@
+/*******************************************************************************
+ * DEMO PROJECT: Capitol Kings Credit Portfolio Demo
+ * Script: 05_streamlit/04_create_export_stage.sql
+ *
+ * PURPOSE:
+ *   Hold large dashboard exports. When an analyst exports on the warehouse, or
+ *   an export is past the in-app download cap, the app COPYs the query result
+ *   into one file on this stage and hands out a presigned URL, so the rows
+ *   never pass through the Streamlit container (see app/export.py).
+ *
+ * OBJECTS CREATED:
+ *   - SFE_ANALYTICS_CREDIT.SFE_DASHBOARD_EXPORTS (internal stage)
+ *
+ * NOTES:
+ *   - Server-side encryption is required for presigned URLs on an internal stage.
+ *   - Each export is written under its own random folder. Stage files do not
+ *     expire on their own; clear old ones with the REMOVE below.
+ *
+ * CLEANUP:
+ *   See sql/99_cleanup/teardown_all.sql
+ ******************************************************************************/
+
+USE ROLE ACCOUNTADMIN;
+USE DATABASE SNOWFLAKE_EXAMPLE;
+USE SCHEMA SFE_ANALYTICS_CREDIT;
+
+CREATE STAGE IF NOT EXISTS SFE_DASHBOARD_EXPORTS
+  ENCRYPTION = (TYPE = 'SNOWFLAKE_SSE')
+  COMMENT = 'DEMO: credit-portfolio - Large dashboard exports served by presigned URL | Author: SE Community | Expires: 2025-12-21';
+
+-- Exports on the stage
+-- LIST @SFE_DASHBOARD_EXPORTS;
+
+-- Clear all exports
+-- REMOVE @SFE_DASHBOARD_EXPORTS;
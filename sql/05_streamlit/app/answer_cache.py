@@ -0,0 +1,72 @@
+"""
+Response cache for first-turn Cortex Agent questions.
+
+Answers are keyed on the normalized prompt plus the dashboard data watermark,
+so a repeated question is served from memory until the underlying data
+changes. Entries expire after a TTL and the least recently used entry is
+evicted once the cache is full. Only thread-less, first-turn questions are
+cacheable: follow-ups depend on conversation context the key cannot capture.
+"""
+
+import re
+import threading
+import time
+from collections import OrderedDict
+
+_WHITESPACE = re.compile(r'\s+')
+_TRAILING_PUNCTUATION = re.compile(r'[\s?.!]+$')
+
+def normalize_prompt(prompt):
+    """Fold case, whitespace and trailing punctuation so trivially different phrasings share a key."""
+    return _TRAILING_PUNCTUATION.sub('', _WHITESPACE.sub(' ', prompt.strip().casefold()))
+
+def data_version_key(data_version):
+    """Flatten the dashboard data watermark into a stable string."""
+    return ':'.join(str(data_version[field]) for field in sorted(data_version))
+
+class AnswerCache:
+    """
+    Thread-safe in-process LRU with per-entry TTL.
+
+    Values are opaque to the cache; the app stores a dict holding the answer
+    text and any result tables.
+    """
+
+    def __init__(self, max_entries=256, ttl_seconds=6 * 3600, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(prompt, data_version):
+        return (normalize_prompt(prompt), data_version_key(data_version))
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or self._clock() - entry[0] > self.ttl_seconds:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (self._clock(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
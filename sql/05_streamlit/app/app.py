@@ -1,171 +1,367 @@
 import streamlit as st
 from snowflake.snowpark.context import get_active_session
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout
 from datetime import datetime
+import functools
+import os
+import threading
+import time
+import uuid
+import numpy as np
 import pandas as pd
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+import export
+import loaders
+import telemetry
+from answer_cache import AnswerCache
+from loaders import (
+    get_asset_holders,
+    get_changed_deals,
+    get_deal_originators,
+    get_deal_summary,
+    get_exposure_by_industry,
+    get_portfolio_summary,
+    get_top_deals_by_exposure,
+)
+from sse import AgentStreamReader
 
 st.set_page_config(page_title="Capitol Kings Credit Portfolio", layout="wide", page_icon="📊")
 session = get_active_session()
 
-# Helper functions
-@st.cache_data(show_spinner=False)
-def get_data_freshness():
-    result = session.sql(
-        """
-        SELECT 
-            MAX(d.calendar_date) AS latest_date,
-            COUNT(DISTINCT f.deal_id) AS deal_count,
-            COUNT(DISTINCT f.company_id) AS company_count
-        FROM SNOWFLAKE_EXAMPLE.SFE_ANALYTICS_CREDIT.FACT_POSITION_SNAPSHOT f
-        JOIN SNOWFLAKE_EXAMPLE.SFE_ANALYTICS_CREDIT.DIM_DATE d ON f.date_id = d.date_key
-        """
-    ).collect()
-    return result[0] if result else None
+# Telemetry
+# One recorder per script run. Every statement goes through traced_session, which
+# records its wall time, query ID and row count; loader and agent calls open spans
+# around them. Events are shown in the debug sidebar and written in batches to
+# DASHBOARD_TELEMETRY (sql/05_streamlit/02_create_telemetry_table.sql).
+if "telemetry_buffer" not in st.session_state:
+    st.session_state.telemetry_buffer = telemetry.TelemetryBuffer()
+    st.session_state.telemetry_session = uuid.uuid4().hex
+    st.session_state.telemetry_run = 0
+st.session_state.telemetry_run += 1
+recorder = telemetry.Recorder(st.session_state.telemetry_session, st.session_state.telemetry_run)
+traced_session = telemetry.TracedSession(session, recorder)
 
-@st.cache_data(show_spinner=False)
-def get_portfolio_summary():
-    df = session.sql(
-        """
-        SELECT
-            SUM(f.exposure) AS total_exposure,
-            SUM(f.commitment) AS total_commitment,
-            SUM(f.fair_value) AS total_fair_value,
-            AVG(f.mark) AS average_mark,
-            COUNT(DISTINCT f.deal_id) AS deal_count,
-            COUNT(DISTINCT f.company_id) AS company_count
-        FROM SNOWFLAKE_EXAMPLE.SFE_ANALYTICS_CREDIT.FACT_POSITION_SNAPSHOT f
-        JOIN SNOWFLAKE_EXAMPLE.SFE_ANALYTICS_CREDIT.DIM_DATE d ON f.date_id = d.date_key
-        WHERE d.calendar_date = CURRENT_DATE()
-        """
-    ).to_pandas()
-    return df.iloc[0] if not df.empty else None
-
-@st.cache_data(show_spinner=False)
-def get_top_deals_by_exposure(limit=10):
-    return session.sql(
-        f"""
-        SELECT
-            deals.deal_name,
-            companies.company_name,
-            deals.watchlist,
-            deals.rating,
-            SUM(f.exposure) AS total_exposure,
-            SUM(f.commitment) AS total_commitment,
-            AVG(f.mark) AS average_mark
-        FROM SNOWFLAKE_EXAMPLE.SFE_ANALYTICS_CREDIT.FACT_POSITION_SNAPSHOT f
-        JOIN SNOWFLAKE_EXAMPLE.SFE_ANALYTICS_CREDIT.DIM_DEAL deals ON f.deal_id = deals.deal_id
-        JOIN SNOWFLAKE_EXAMPLE.SFE_ANALYTICS_CREDIT.DIM_COMPANY companies ON f.company_id = companies.company_id
-        JOIN SNOWFLAKE_EXAMPLE.SFE_ANALYTICS_CREDIT.DIM_DATE d ON f.date_id = d.date_key
-        WHERE d.calendar_date = CURRENT_DATE()
-        GROUP BY deals.deal_name, companies.company_name, deals.watchlist, deals.rating
-        ORDER BY total_exposure DESC
-        LIMIT {limit}
-        """
-    ).to_pandas()
+def record_telemetry():
+    """
+    Queue events recorded since the last call and flush the batch when due.
+    Called at the end of the script and of the chat fragment, whose reruns
+    skip the rest of the script.
+    """
+    st.session_state.telemetry_buffer.extend(recorder.take_new())
+    if st.session_state.telemetry_buffer.flush_due():
+        st.session_state.telemetry_buffer.flush(session)
 
-@st.cache_data(show_spinner=False)
-def get_exposure_by_industry():
-    return session.sql(
-        """
-        SELECT
-            companies.industry,
-            SUM(f.exposure) AS total_exposure,
-            COUNT(DISTINCT f.deal_id) AS deal_count
-        FROM SNOWFLAKE_EXAMPLE.SFE_ANALYTICS_CREDIT.FACT_POSITION_SNAPSHOT f
-        JOIN SNOWFLAKE_EXAMPLE.SFE_ANALYTICS_CREDIT.DIM_COMPANY companies ON f.company_id = companies.company_id
-        JOIN SNOWFLAKE_EXAMPLE.SFE_ANALYTICS_CREDIT.DIM_DATE d ON f.date_id = d.date_key
-        WHERE d.calendar_date = CURRENT_DATE()
-        GROUP BY companies.industry
-        ORDER BY total_exposure DESC
-        """
-    ).to_pandas()
+# Data layer
+# Queries and their in-memory derivations live in loaders.py, which takes the
+# session as an argument so the offline benchmark harness can run the same code.
+# This module binds the active session and owns the Streamlit caches.
+def run_query(statement, params=None):
+    """Execute a canonical statement with bind parameters and return a pandas DataFrame."""
+    return loaders.run_query(traced_session, statement, params)
 
-@st.cache_data(show_spinner=False)
-def get_monthly_exposure_trend():
-    return session.sql(
-        """
-        SELECT
-            d.month_end_date,
-            SUM(f.exposure) AS total_exposure,
-            SUM(f.commitment) AS total_commitment,
-            SUM(f.fair_value) AS total_fair_value
-        FROM SNOWFLAKE_EXAMPLE.SFE_ANALYTICS_CREDIT.FACT_POSITION_SNAPSHOT f
-        JOIN SNOWFLAKE_EXAMPLE.SFE_ANALYTICS_CREDIT.DIM_DATE d ON f.date_id = d.date_key
-        WHERE d.is_month_end = TRUE
-          AND d.year = YEAR(CURRENT_DATE())
-        GROUP BY d.month_end_date
-        ORDER BY d.month_end_date
-        """
-    ).to_pandas()
-
-@st.cache_data(show_spinner=False)
-def get_all_deals(watchlist_filter=None, originator_filter=None):
-    base_query = """
-        SELECT
-            deals.deal_name,
-            companies.company_name,
-            deals.watchlist,
-            deals.rating,
-            deals.originator1,
-            deals.deal_date,
-            SUM(f.exposure) AS total_exposure,
-            SUM(f.fair_value) AS total_fair_value
-        FROM SNOWFLAKE_EXAMPLE.SFE_ANALYTICS_CREDIT.FACT_POSITION_SNAPSHOT f
-        JOIN SNOWFLAKE_EXAMPLE.SFE_ANALYTICS_CREDIT.DIM_DEAL deals ON f.deal_id = deals.deal_id
-        JOIN SNOWFLAKE_EXAMPLE.SFE_ANALYTICS_CREDIT.DIM_COMPANY companies ON f.company_id = companies.company_id
-        JOIN SNOWFLAKE_EXAMPLE.SFE_ANALYTICS_CREDIT.DIM_DATE d ON f.date_id = d.date_key
-        WHERE d.calendar_date = CURRENT_DATE()
+def run_rows(statement, params=None):
+    """Execute a canonical statement with bind parameters and return Snowpark Rows."""
+    return loaders.run_rows(traced_session, statement, params)
+
+# Cache policy
+# Every loader takes the data version as its first argument, so a new load
+# produces new cache keys and old entries simply age out. The TTL is a safety
+# net, and max_entries bounds how many versions each loader keeps in memory.
+# Snapshots and deal cubes are also keyed by as-of date, so their max_entries
+# is a per-date LRU: flipping between recent month-ends is served from memory.
+CACHE_POLICY = {
+    'data_version': {'ttl': 60, 'max_entries': 1},
+    'freshness': {'ttl': 4 * 3600, 'max_entries': 1},
+    'snapshot_dates': {'ttl': 4 * 3600, 'max_entries': 1},
+    'snapshot': {'ttl': 4 * 3600, 'max_entries': 12},
+    'deal_grid': {'ttl': 4 * 3600, 'max_entries': 64},
+    'drilldown': {'ttl': 4 * 3600, 'max_entries': 64},
+    'deal_deltas': {'ttl': 4 * 3600, 'max_entries': 8},
+    'trend': {'ttl': 12 * 3600, 'max_entries': 8},
+}
+
+def cached_loader(policy):
+    """
+    st.cache_data with the named policy, timed as a telemetry span. The inner
+    body only runs on a cache miss, so it is where the miss is recorded.
     """
+    def decorate(loader):
+        @functools.wraps(loader)
+        def compute(*args, **kwargs):
+            recorder.mark_miss()
+            return loader(*args, **kwargs)
+        
+        cached = st.cache_data(show_spinner=False, **CACHE_POLICY[policy])(compute)
+        
+        @functools.wraps(loader)
+        def call(*args, **kwargs):
+            with recorder.span(loader.__name__):
+                return cached(*args, **kwargs)
+        
+        return call
+    return decorate
+
+@cached_loader('data_version')
+def get_data_version():
+    return loaders.load_data_version(traced_session)
+
+@cached_loader('freshness')
+def get_data_freshness(data_version):
+    return loaders.load_data_freshness(traced_session)
+
+@cached_loader('snapshot_dates')
+def get_snapshot_dates(data_version):
+    return loaders.load_snapshot_dates(traced_session)
+
+@cached_loader('snapshot')
+def get_snapshot(data_version, date_id):
+    return loaders.load_snapshot(traced_session, date_id)
+
+@cached_loader('trend')
+def get_exposure_trend(data_version, start_date, end_date, step):
+    return loaders.load_exposure_trend(traced_session, start_date, end_date, step)
+
+@cached_loader('deal_grid')
+def get_deal_page(data_version, date_id, watchlist_filter, originator_filter, after):
+    return loaders.load_deal_page(traced_session, date_id, watchlist_filter, originator_filter, after)
+
+@cached_loader('drilldown')
+def get_deal_drilldown(data_version, date_id, deal_id):
+    return loaders.load_deal_drilldown(traced_session, date_id, deal_id)
+
+@cached_loader('deal_deltas')
+def get_deal_deltas(data_version, date_id, anchor_date_id):
+    return loaders.load_deal_deltas(traced_session, date_id, anchor_date_id)
+
+# Concurrent loading
+# A page submits its independent loaders together and gathers them afterwards,
+# so a cold page waits for its slowest query instead of the sum of all of them;
+# cache hits return straight away on the worker. Each script run has its own
+# small pool with a worker per loader a page submits, so a loader starts as
+# soon as it is submitted and its deadline never includes time queued behind
+# other viewers' loaders. A loader still running after LOADER_TIMEOUT_SECONDS
+# keeps going in the background (its result lands in the cache for the next
+# rerun) while its section renders a placeholder and the rest of the page is
+# shown; the pool's threads exit once their work is done and the run's batch
+# is discarded.
+LOADER_TIMEOUT_SECONDS = 20
+LOADER_WORKERS = 4
+
+class LoaderBatch:
+    """Cached loaders submitted for one page; result() waits up to each loader's own deadline."""
     
-    if watchlist_filter and watchlist_filter != "All":
-        base_query += f" AND deals.watchlist = '{watchlist_filter}'"
+    def __init__(self, timeout=LOADER_TIMEOUT_SECONDS):
+        self.timeout = timeout
+        self.script_run_ctx = get_script_run_ctx()
+        self.pool = ThreadPoolExecutor(max_workers=LOADER_WORKERS, thread_name_prefix="dashboard-loader")
+        self.deadlines = {}
     
-    if originator_filter and originator_filter != "All":
-        base_query += f" AND deals.originator1 = '{originator_filter}'"
+    def submit(self, loader, *args):
+        future = self.pool.submit(self._run, loader, args)
+        self.deadlines[future] = time.monotonic() + self.timeout
+        return future
     
-    base_query += """
-        GROUP BY deals.deal_name, companies.company_name, deals.watchlist, deals.rating, deals.originator1, deals.deal_date
-        ORDER BY total_exposure DESC
-    """
+    def _run(self, loader, args):
+        # Attach this run's context so st.cache_data calls on the worker resolve as they would inline
+        add_script_run_ctx(threading.current_thread(), self.script_run_ctx)
+        return loader(*args)
     
-    return session.sql(base_query).to_pandas()
+    def result(self, future):
+        """The loader's result, or None if it missed its deadline."""
+        try:
+            return future.result(timeout=max(self.deadlines[future] - time.monotonic(), 0))
+        except FuturesTimeout:
+            return None
 
-@st.cache_data(show_spinner=False)
-def get_unique_originators():
-    result = session.sql(
-        """
-        SELECT DISTINCT originator1
-        FROM SNOWFLAKE_EXAMPLE.SFE_ANALYTICS_CREDIT.DIM_DEAL
-        WHERE originator1 IS NOT NULL
-        ORDER BY originator1
-        """
-    ).collect()
-    return ["All"] + [row[0] for row in result]
+def render_still_loading(label):
+    st.info(f"⏳ {label} is taking longer than usual and will appear when you refresh.")
+    st.button("Refresh", key=f"refresh_{label}")
 
-# Header
-st.title("📊 Capitol Kings Credit Portfolio Dashboard")
-st.caption("🔒 Credit portfolio analytics powered by Snowflake Intelligence")
+# As-of date
+# Defaults to the latest snapshot that exists (MAX(date_id) from the data
+# version), not CURRENT_DATE(), which has no positions unless a load ran today.
+# The choice is kept outside the widget's own state so it survives visits to
+# pages that do not render the selector.
+def snapshot_date_labels(dates):
+    return {
+        row.DATE_ID: f"{row.CALENDAR_DATE}{' (month-end)' if row.IS_MONTH_END else ''}"
+        for row in dates.itertuples(index=False)
+    }
 
-# Data freshness banner
-freshness = get_data_freshness()
-if freshness:
-    col1, col2, col3 = st.columns(3)
-    with col1:
-        st.metric("📅 Latest Data", str(freshness['LATEST_DATE']))
-    with col2:
-        st.metric("📈 Total Deals", f"{freshness['DEAL_COUNT']}")
-    with col3:
-        st.metric("🏢 Companies", f"{freshness['COMPANY_COUNT']}")
+def select_as_of_date(data_version):
+    dates = get_snapshot_dates(data_version)
+    if dates.empty:
+        return data_version['max_date_id']
+    
+    options = dates['DATE_ID'].tolist()
+    labels = snapshot_date_labels(dates)
+    selected = st.session_state.get('as_of_date_id')
+    index = options.index(selected) if selected in options else 0
+    
+    with st.sidebar:
+        date_id = st.selectbox("📅 As of", options, index=index, format_func=labels.get, key='as_of_date_picker')
+    st.session_state.as_of_date_id = date_id
+    return date_id
 
-st.divider()
+# Table rendering
+# Watchlist highlighting is one vectorized style frame per table, applied with
+# Styler.apply(axis=None), instead of a Python callback per row or cell; grids
+# only ever receive one page of rows, so styling and serialization cost stays
+# flat however many deals the portfolio holds.
+WATCHLIST_ROW_STYLES = {
+    'Intensive Care': 'background-color: #ffebee',
+    'Watchlist': 'background-color: #fff9c4',
+}
+WATCHLIST_CELL_STYLES = {
+    'Intensive Care': 'background-color: #ff5252; color: white',
+    'Watchlist': 'background-color: #ffd740',
+}
+
+def watchlist_styles(frame, styles, columns=None):
+    """Style frame for Styler.apply(axis=None): `columns` (default all) styled by each row's WATCHLIST."""
+    watchlist = frame['WATCHLIST'].to_numpy()
+    row_style = np.select([watchlist == status for status in styles], list(styles.values()), default='')
+    css = pd.DataFrame('', index=frame.index, columns=frame.columns)
+    for column in columns or frame.columns:
+        css[column] = row_style
+    return css
 
-# Tabs for different views
-tab1, tab2, tab3, tab4 = st.tabs(["📊 Portfolio Summary", "💼 Deal Analysis", "📈 Time Series", "💬 Cortex Chat"])
+def format_millions(value):
+    """Per-deal measures are stored as float32 (loaders.compact_deals), so they are shown in $M, not to the dollar."""
+    return f"${value / 1e6:,.2f}M"
+
+def page_of(frame, key, page_size=loaders.DEAL_PAGE_SIZE):
+    """One page of an in-memory frame, with a page picker when there is more than one."""
+    page_count = max(-(-len(frame) // page_size), 1)
+    if page_count == 1:
+        return frame
+    page = st.number_input(f"Page (of {page_count})", min_value=1, max_value=page_count, value=1, key=key)
+    start = (page - 1) * page_size
+    return frame.iloc[start:start + page_size]
+
+# Exports
+# An export streams its query into a file one result batch at a time
+# (export.py), inside a fragment so preparing one reruns only the panel. The
+# slot semaphore bounds how many downloads the shared container writes at once
+# across all sessions. A served download stays in Streamlit's media file
+# manager while its button is shown, so each session can hold at most
+# EXPORT_MAX_BYTES; larger exports run on the warehouse and need no slot.
+EXPORT_SLOTS = 2
+
+@st.cache_resource
+def get_export_slots():
+    return threading.BoundedSemaphore(EXPORT_SLOTS)
+
+@st.fragment
+def export_panel(key, date_id, watchlist_filter=None, originator_filter=None, deal_id=None):
+    """
+    Export the deals matching the filters or their positions, or only one
+    deal's positions when deal_id is given, as CSV or Parquet.
+    """
+    if deal_id is None:
+        contents = st.radio("Rows", ["Deals", "Positions"], horizontal=True, key=f"{key}_contents")
+    else:
+        contents = "Positions"
+    export_format = st.radio("Format", list(export.EXPORT_FORMATS), horizontal=True, key=f"{key}_format")
+    to_stage = st.toggle(
+        "Export on the warehouse (any size, download link valid for "
+        f"{export.EXPORT_URL_EXPIRY_SECONDS // 3600} hour)",
+        help=f"Downloads from the app are limited to {export.EXPORT_MAX_ROWS:,} rows and "
+             f"{export.EXPORT_MAX_BYTES / 1e6:,.0f} MB; larger exports run on the warehouse anyway.",
+        key=f"{key}_to_stage"
+    )
+    
+    if contents == "Deals":
+        statement = loaders.DEAL_EXPORT_SQL
+        params = loaders.deal_export_params(date_id, watchlist_filter, originator_filter)
+        name = f"deals_{date_id}"
+    else:
+        statement = loaders.POSITION_EXPORT_SQL
+        params = loaders.position_export_params(date_id, watchlist_filter, originator_filter, deal_id)
+        name = f"positions_{date_id}" + (f"_deal{deal_id}" if deal_id is not None else "")
+    
+    if st.button("Prepare export", key=f"{key}_prepare"):
+        if to_stage or not export_download(statement, params, export_format, name, key):
+            export_to_stage(statement, params, export_format, name)
+    record_telemetry()
+
+def export_to_stage(statement, params, export_format, name):
+    """Unload the export to the stage; a failure (stage not deployed, missing privileges) is shown, not raised."""
+    error = None
+    with recorder.span('export_to_stage', kind='export') as event, st.spinner("Exporting on the warehouse…"):
+        try:
+            unloaded = export.unload_to_stage(traced_session, statement, params, export_format, uuid.uuid4().hex, name)
+            event['rows'] = unloaded.rows
+        except Exception as exc:
+            error = exc
+            event['detail'] = {'error': str(exc)}
+    if error is not None:
+        st.error(f"The export on the warehouse failed: {error}")
+        return
+    st.success(f"Exported {unloaded.rows:,} rows ({unloaded.size / 1e6:,.1f} MB) to {unloaded.path}")
+    st.link_button("⬇️ Download", unloaded.url)
+
+def export_download(statement, params, export_format, name, key):
+    """Offer the export as an in-app download; False when it is too large for one."""
+    slots = get_export_slots()
+    if not slots.acquire(blocking=False):
+        st.warning("Other exports are being prepared right now. Try again in a moment, or export on the warehouse.")
+        return True
+    written = None
+    try:
+        with recorder.span('export_download', kind='export') as event, st.spinner("Preparing export…"):
+            written = export.write_export(traced_session, statement, params, export_format)
+            if written is not None:
+                event['rows'] = written.rows
+        if written is None:
+            st.info("This export is too large to download from the app, so it runs on the warehouse.")
+            return False
+        file_format = export.EXPORT_FORMATS[export_format]
+        # The download button takes the file's bytes, so it is registered while the slot is still held
+        with open(written.path, 'rb') as file:
+            st.download_button(
+                f"⬇️ Download {written.rows:,} rows ({written.size / 1e6:,.1f} MB)",
+                file,
+                file_name=f"{name}{file_format.suffix}",
+                mime=file_format.mime,
+                key=f"{key}_download"
+            )
+    finally:
+        slots.release()
+        if written is not None:
+            os.remove(written.path)
+    return True
 
-# TAB 1: Portfolio Summary
-with tab1:
+# Data freshness banner, shown above the dashboard pages
+def render_freshness_banner(freshness):
+    if freshness is not None:
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("📅 Latest Data", str(freshness['latest_date']))
+        with col2:
+            st.metric("📈 Total Deals", f"{freshness['overall_deal_count']}")
+        with col3:
+            st.metric("🏢 Companies", f"{freshness['overall_company_count']}")
+    
+    st.divider()
+
+# Pages
+# Each view is an st.Page function and only the selected page runs, so a view
+# loads its own data when it is opened: the chat page issues no dashboard
+# queries, and the deal cube and trend are only built on the pages that show them.
+
+# PAGE 1: Portfolio Summary
+def portfolio_summary_page():
+    data_version = get_data_version()
+    loads = LoaderBatch()
+    freshness = loads.submit(get_data_freshness, data_version)
+    snapshot = get_snapshot(data_version, select_as_of_date(data_version))
+    render_freshness_banner(loads.result(freshness))
+    
     st.header("Portfolio Overview")
     
-    summary = get_portfolio_summary()
+    summary = get_portfolio_summary(snapshot)
     if summary is not None:
         col1, col2, col3, col4 = st.columns(4)
         
@@ -182,19 +378,15 @@ with tab1:
         
         # Top 10 deals by exposure
         st.subheader("Top 10 Deals by Exposure")
-        top_deals = get_top_deals_by_exposure(10)
+        top_deals = get_top_deals_by_exposure(snapshot, 10)
         
         if not top_deals.empty:
             # Add color coding for watchlist status
-            def highlight_watchlist(row):
-                if row['WATCHLIST'] == 'Intensive Care':
-                    return ['background-color: #ffebee'] * len(row)
-                elif row['WATCHLIST'] == 'Watchlist':
-                    return ['background-color: #fff9c4'] * len(row)
-                else:
-                    return [''] * len(row)
-            
-            styled_df = top_deals.style.apply(highlight_watchlist, axis=1)
+            styled_df = (
+                top_deals.style
+                .apply(watchlist_styles, axis=None, styles=WATCHLIST_ROW_STYLES)
+                .format(format_millions, subset=['TOTAL_EXPOSURE', 'TOTAL_COMMITMENT'])
+            )
             st.dataframe(styled_df, use_container_width=True, height=400)
             
             # Bar chart
@@ -206,7 +398,7 @@ with tab1:
         
         # Exposure by industry (pie chart)
         st.subheader("Exposure by Industry")
-        industry_data = get_exposure_by_industry()
+        industry_data = get_exposure_by_industry(snapshot)
         
         if not industry_data.empty:
             col1, col2 = st.columns([2, 1])
@@ -223,8 +415,20 @@ with tab1:
                     height=300
                 )
 
-# TAB 2: Deal Analysis
-with tab2:
+# PAGE 2: Deal Analysis
+# Filter options and summary metrics are derived in memory from the cached
+# snapshot shared with the Portfolio Summary, so changing a filter costs no
+# warehouse time. The grid is fetched a page at a time with keyset cursors
+# (loaders.DEAL_PAGE_SQL) and a deal's assets and holders only when its row is
+# selected, so rendering never grows with the number of deals or positions.
+def deal_analysis_page():
+    data_version = get_data_version()
+    date_id = select_as_of_date(data_version)
+    loads = LoaderBatch()
+    freshness = loads.submit(get_data_freshness, data_version)
+    snapshot = loads.submit(get_snapshot, data_version, date_id)
+    banner = st.container()
+    
     st.header("Deal Analysis & Filters")
     
     # Filters
@@ -234,54 +438,238 @@ with tab2:
             "Filter by Watchlist Status",
             options=["All", "None", "Watchlist", "Intensive Care"]
         )
+    snapshot = loads.result(snapshot)
     with col2:
-        originators = get_unique_originators()
         originator_filter = st.selectbox(
             "Filter by Originator",
-            options=originators
+            options=get_deal_originators(snapshot) if snapshot is not None else ["All"]
         )
     
-    # Get filtered deals
-    deals_df = get_all_deals(watchlist_filter, originator_filter)
+    # Page cursors: deal_cursors[i] is the key page i starts after; a new date
+    # or filter starts again from the first page
+    grid_key = (date_id, watchlist_filter, originator_filter)
+    if st.session_state.get('deal_grid_key') != grid_key:
+        st.session_state.deal_grid_key = grid_key
+        st.session_state.deal_cursors = [None]
+    cursors = st.session_state.deal_cursors
+    
+    page = loads.submit(get_deal_page, data_version, date_id, watchlist_filter, originator_filter, cursors[-1])
+    deal_stats = get_deal_summary(snapshot, watchlist_filter, originator_filter) if snapshot is not None else None
     
-    if not deals_df.empty:
-        st.subheader(f"Found {len(deals_df)} deals")
+    with banner:
+        render_freshness_banner(loads.result(freshness))
+    page = loads.result(page)
+    
+    if page is None:
+        render_still_loading("The deal grid")
+    elif not page.deals.empty:
+        first = (len(cursors) - 1) * loaders.DEAL_PAGE_SIZE
+        if deal_stats is not None:
+            st.subheader(f"Found {deal_stats['deal_count']} deals")
+        st.caption(f"Showing {first + 1}–{first + len(page.deals)} by exposure. Select a deal to drill into its assets.")
         
         # Color code by watchlist status
-        def color_watchlist(val):
-            if val == 'Intensive Care':
-                return 'background-color: #ff5252; color: white'
-            elif val == 'Watchlist':
-                return 'background-color: #ffd740'
-            return ''
+        styled_df = page.deals.drop(columns=['DEAL_ID']).style.apply(
+            watchlist_styles, axis=None, styles=WATCHLIST_CELL_STYLES, columns=['WATCHLIST']
+        )
+        selection = st.dataframe(
+            styled_df,
+            use_container_width=True,
+            height=500,
+            hide_index=True,
+            on_select="rerun",
+            selection_mode="single-row",
+            key=f"deal_grid_{hash(grid_key)}_{len(cursors)}"
+        )
+        
+        col1, col2, col3 = st.columns([1, 1, 4])
+        with col1:
+            st.button("← Previous", disabled=len(cursors) == 1, on_click=cursors.pop, use_container_width=True)
+        with col2:
+            st.button("Next →", disabled=page.cursor is None, on_click=cursors.append, args=(page.cursor,),
+                      use_container_width=True)
+        
+        with st.expander("⬇️ Export"):
+            export_panel("export_deals", date_id, watchlist_filter, originator_filter)
         
-        styled_df = deals_df.style.applymap(color_watchlist, subset=['WATCHLIST'])
-        st.dataframe(styled_df, use_container_width=True, height=500)
+        selected_rows = selection.selection.rows
+        if selected_rows:
+            render_deal_drilldown(data_version, date_id, page.deals.iloc[selected_rows[0]])
         
         # Summary statistics
         st.divider()
-        col1, col2, col3 = st.columns(3)
-        with col1:
-            st.metric("Total Deals", len(deals_df))
-        with col2:
-            st.metric("Avg Exposure", f"${deals_df['TOTAL_EXPOSURE'].mean():,.0f}")
-        with col3:
-            watchlist_count = len(deals_df[deals_df['WATCHLIST'].isin(['Watchlist', 'Intensive Care'])])
-            st.metric("Watchlist Deals", watchlist_count)
+        if deal_stats is None:
+            render_still_loading("The deal summary")
+        else:
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("Total Deals", deal_stats['deal_count'])
+            with col2:
+                st.metric("Avg Exposure", format_millions(deal_stats['average_exposure']))
+            with col3:
+                st.metric("Watchlist Deals", deal_stats['watchlist_count'])
     else:
         st.info("No deals match the selected filters")
 
-# TAB 3: Time Series
-with tab3:
-    st.header("Monthly Exposure Trends")
+def render_deal_drilldown(data_version, date_id, deal):
+    """Deal → assets → fund/sponsor holders, fetched for the selected deal only."""
+    st.divider()
+    st.subheader(f"🔍 {deal['DEAL_NAME']}")
+    st.caption(f"{deal['COMPANY_NAME']} · originated {deal['DEAL_DATE']}")
+    
+    drilldown = get_deal_drilldown(data_version, date_id, loaders.to_python(deal['DEAL_ID']))
+    if drilldown.assets.empty:
+        st.info("No positions for this deal on the selected date")
+        return
+    
+    asset_selection = st.dataframe(
+        drilldown.assets.drop(columns=['ASSET_ID']),
+        use_container_width=True,
+        hide_index=True,
+        on_select="rerun",
+        selection_mode="single-row",
+        key=f"deal_assets_{date_id}_{deal['DEAL_ID']}"
+    )
+    
+    selected_assets = asset_selection.selection.rows
+    if selected_assets:
+        asset = drilldown.assets.iloc[selected_assets[0]]
+        st.markdown(f"**Fund and sponsor holders of {asset['ASSET_NAME']}**")
+        st.dataframe(
+            get_asset_holders(drilldown, asset['ASSET_ID']),
+            use_container_width=True,
+            hide_index=True
+        )
+    else:
+        st.caption("Select an asset to see the funds and sponsors holding it.")
+    
+    with st.expander(f"⬇️ Export positions of {deal['DEAL_NAME']}"):
+        export_panel("export_deal_positions", date_id, deal_id=loaders.to_python(deal['DEAL_ID']))
+
+# PAGE 3: Deal Changes
+# Period-over-period changes are precomputed per (date, anchor date) in
+# DT_DEAL_DELTAS, for the anchors loaders.get_delta_anchors lists; the
+# threshold is applied in memory, so moving it never goes back to the warehouse.
+def deal_changes_page():
+    data_version = get_data_version()
+    date_id = select_as_of_date(data_version)
+    loads = LoaderBatch()
+    freshness = loads.submit(get_data_freshness, data_version)
+    banner = st.container()
+    
+    st.header("Deal Changes")
+    
+    dates = get_snapshot_dates(data_version)
+    anchors = loaders.get_delta_anchors(dates, date_id)
+    if anchors.empty:
+        with banner:
+            render_freshness_banner(loads.result(freshness))
+        st.info("No earlier snapshot to compare against")
+        return
+    
+    anchor_options = anchors['DATE_ID'].tolist()
+    prior_month_end = loaders.get_prior_month_end(dates, date_id)
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        anchor_date_id = st.selectbox(
+            "Compare against",
+            options=anchor_options,
+            index=anchor_options.index(prior_month_end) if prior_month_end in anchor_options else 0,
+            format_func=snapshot_date_labels(anchors).get
+        )
+    with col2:
+        measure_label = st.selectbox("Measure", options=list(loaders.DELTA_MEASURES))
+    with col3:
+        threshold = st.number_input("Minimum change (%)", min_value=0.0, value=2.0, step=0.5)
+    
+    measure = loaders.DELTA_MEASURES[measure_label]
+    deltas = loads.submit(get_deal_deltas, data_version, date_id, anchor_date_id)
+    with banner:
+        render_freshness_banner(loads.result(freshness))
+    deltas = loads.result(deltas)
+    if deltas is None:
+        render_still_loading("Deal changes")
+        return
+    changed = get_changed_deals(deltas, measure, threshold / 100)
+    
+    if not changed.empty:
+        st.subheader(f"{len(changed)} of {len(deltas)} deals changed {measure_label.lower()} by more than {threshold:g}%")
+        rows = page_of(changed, key=f"deal_changes_page_{date_id}_{anchor_date_id}_{measure}_{threshold}")
+        st.dataframe(
+            rows.assign(**{f'{measure}_PCT_CHANGE': rows[f'{measure}_PCT_CHANGE'] * 100}),
+            use_container_width=True,
+            height=500,
+            column_config={
+                f'ANCHOR_{measure}': st.column_config.NumberColumn(format="$%.0f"),
+                measure: st.column_config.NumberColumn(format="$%.0f"),
+                f'{measure}_CHANGE': st.column_config.NumberColumn(format="$%.0f"),
+                f'{measure}_PCT_CHANGE': st.column_config.NumberColumn(format="%+.2f%%"),
+            },
+        )
+    else:
+        st.info("No deals changed by more than the selected threshold")
+
+# PAGE 4: Time Series
+# Any range of the full month-end history. MoM, YoY and rolling averages come
+# from window functions in EXPOSURE_TREND_SQL, and long ranges are sampled
+# server-side to at most TREND_MAX_POINTS points.
+def time_series_page():
+    data_version = get_data_version()
+    loads = LoaderBatch()
+    freshness = loads.submit(get_data_freshness, data_version)
+    banner = st.container()
+    
+    st.header("Portfolio Trends")
+    
+    month_ends = loaders.get_month_ends(get_snapshot_dates(data_version))
+    if not month_ends:
+        with banner:
+            render_freshness_banner(loads.result(freshness))
+        st.info("No time series data available")
+        return
+    
+    if len(month_ends) > 1:
+        start_date, end_date = st.select_slider(
+            "Date range",
+            options=month_ends,
+            value=(month_ends[0], month_ends[-1])
+        )
+    else:
+        start_date = end_date = month_ends[0]
     
-    trend_data = get_monthly_exposure_trend()
+    month_count = sum(start_date <= month_end <= end_date for month_end in month_ends)
+    step = loaders.get_trend_step(month_count)
+    trend_data = loads.submit(get_exposure_trend, data_version, start_date, end_date, step)
+    with banner:
+        render_freshness_banner(loads.result(freshness))
+    trend_data = loads.result(trend_data)
     
-    if not trend_data.empty:
-        # Line chart for exposure trend
+    if trend_data is None:
+        render_still_loading("The trend")
+    elif not trend_data.empty:
+        if step > 1:
+            st.caption(f"{month_count} month-ends in range, sampled {loaders.TREND_STEPS[step]} to keep charts responsive")
+        
+        # Latest point: change figures are computed server-side over the monthly series
+        latest = trend_data.iloc[-1]
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("Total Exposure", f"${latest['TOTAL_EXPOSURE']:,.0f}")
+        with col2:
+            mom = latest['EXPOSURE_MOM_PCT']
+            st.metric("Month-over-Month Change", "n/a" if pd.isna(mom) else f"{mom * 100:+.2f}%")
+        with col3:
+            yoy = latest['EXPOSURE_YOY_PCT']
+            st.metric("Year-over-Year Change", "n/a" if pd.isna(yoy) else f"{yoy * 100:+.2f}%")
+        with col4:
+            st.metric("Deals", f"{latest['DEAL_COUNT']}")
+        
+        st.divider()
+        
+        # Exposure with rolling averages
         st.subheader("Total Exposure by Month-End")
         st.line_chart(
-            trend_data.set_index('MONTH_END_DATE')['TOTAL_EXPOSURE'],
+            trend_data.set_index('MONTH_END_DATE')[['TOTAL_EXPOSURE', 'EXPOSURE_3M_AVG', 'EXPOSURE_12M_AVG']],
             height=300
         )
         
@@ -290,7 +678,10 @@ with tab3:
         # Multi-metric view
         st.subheader("All Metrics Trend")
         st.line_chart(
-            trend_data.set_index('MONTH_END_DATE')[['TOTAL_EXPOSURE', 'TOTAL_COMMITMENT', 'TOTAL_FAIR_VALUE']],
+            trend_data.set_index('MONTH_END_DATE')[[
+                'TOTAL_EXPOSURE', 'TOTAL_COMMITMENT', 'TOTAL_FAIR_VALUE',
+                'TOTAL_FUNDED_PAR', 'TOTAL_UNFUNDED_PAR'
+            ]],
             height=300
         )
         
@@ -298,37 +689,111 @@ with tab3:
         
         # Data table
         st.subheader("Monthly Summary Table")
+        currency = st.column_config.NumberColumn(format="$%.0f")
+        percent = st.column_config.NumberColumn(format="%+.2f%%")
         st.dataframe(
-            trend_data.style.format({
-                'TOTAL_EXPOSURE': '${:,.0f}',
-                'TOTAL_COMMITMENT': '${:,.0f}',
-                'TOTAL_FAIR_VALUE': '${:,.0f}'
-            }),
-            use_container_width=True
+            trend_data.drop(columns=['YEAR', 'MONTH']).assign(
+                EXPOSURE_MOM_PCT=trend_data['EXPOSURE_MOM_PCT'] * 100,
+                EXPOSURE_YOY_PCT=trend_data['EXPOSURE_YOY_PCT'] * 100,
+            ),
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                'TOTAL_EXPOSURE': currency,
+                'TOTAL_COMMITMENT': currency,
+                'TOTAL_FAIR_VALUE': currency,
+                'TOTAL_FUNDED_PAR': currency,
+                'TOTAL_UNFUNDED_PAR': currency,
+                'EXPOSURE_3M_AVG': currency,
+                'EXPOSURE_12M_AVG': currency,
+                'AVERAGE_MARK': st.column_config.NumberColumn(format="%.4f"),
+                'EXPOSURE_MOM_PCT': percent,
+                'EXPOSURE_YOY_PCT': percent,
+            },
         )
-        
-        # Month-over-month change
-        if len(trend_data) >= 2:
-            latest_exposure = trend_data.iloc[-1]['TOTAL_EXPOSURE']
-            previous_exposure = trend_data.iloc[-2]['TOTAL_EXPOSURE']
-            change = ((latest_exposure - previous_exposure) / previous_exposure) * 100
-            
-            st.metric(
-                "Month-over-Month Change",
-                f"{change:+.2f}%",
-                delta=f"${latest_exposure - previous_exposure:,.0f}"
-            )
     else:
         st.info("No time series data available")
 
-# TAB 4: Cortex Chat (Interactive)
+# Cortex Agent client
+# Endpoint and credentials for the agent, resolved in a single round trip
+AGENT_CONTEXT_SQL = """
+SELECT
+    CURRENT_ACCOUNT() AS account,
+    CURRENT_REGION() AS region,
+    CURRENT_SESSION() AS session_token
+"""
+AGENT_PATH = "/api/v2/databases/SNOWFLAKE_INTELLIGENCE/schemas/AGENTS/agents/CREDIT_PORTFOLIO_ANALYST:run"
+
+class CortexAgentClient:
+    """
+    Long-lived Cortex Agent REST client.
+    
+    The account host and session token are resolved once, and requests go
+    through a pooled keep-alive requests.Session so later chat turns reuse
+    the open TLS connection. The token is re-read only after a 401.
+    
+    The client outlives the script run that created it, so it keeps no
+    reference to a run's session or recorder: every call takes the current
+    run's run_rows, and its statements are traced into that run.
+    """
+    
+    def __init__(self, run_rows):
+        import requests
+        from requests.adapters import HTTPAdapter
+        
+        context = run_rows(AGENT_CONTEXT_SQL)[0]
+        account = context['ACCOUNT'].lower()
+        region = context['REGION']
+        
+        # Build REST API endpoint
+        # Format: https://<account>.snowflakecomputing.com/api/v2/databases/{db}/schemas/{schema}/agents/{name}:run
+        if 'AWS_' in region:
+            host = f"{account}.snowflakecomputing.com"
+        else:
+            host = f"{account}.{region.lower()}.snowflakecomputing.com"
+        self.agent_url = f"https://{host}{AGENT_PATH}"
+        
+        self.http = requests.Session()
+        self.http.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+        self.http.headers.update({
+            "Content-Type": "application/json",
+            "Accept": "text/event-stream"  # SSE format
+        })
+        self._set_token(context['SESSION_TOKEN'])
+    
+    def _set_token(self, token):
+        # In Streamlit in Snowflake, we use the user's session credentials
+        self.http.headers["Authorization"] = f"Snowflake Token=\"{token}\""
+    
+    def refresh_credentials(self, run_rows):
+        self._set_token(run_rows("SELECT CURRENT_SESSION()")[0][0])
+    
+    def run(self, payload, run_rows):
+        """POST to the agent :run endpoint and return the open streaming response."""
+        response = self.http.post(self.agent_url, json=payload, stream=True, timeout=60)
+        
+        # Session tokens rotate; re-read once and retry before surfacing the 401
+        if response.status_code == 401:
+            response.close()
+            self.refresh_credentials(run_rows)
+            response = self.http.post(self.agent_url, json=payload, stream=True, timeout=60)
+        
+        response.raise_for_status()
+        return response
+
+@st.cache_resource(show_spinner=False, max_entries=32)
+def get_agent_client(session_key, _run_rows):
+    """One client per Snowpark session, so credentials are never shared across sessions."""
+    return CortexAgentClient(_run_rows)
+
+# PAGE 5: Cortex Chat (Interactive)
 # Following Snowflake best practices for Cortex Agent integration:
 # - REST API invocation (not SQL)
 # - Thread management for conversation context
 # - Proper SSE (Server-Sent Events) streaming handling
 # - Specific error handling by HTTP status code
 # Reference: https://docs.snowflake.com/en/user-guide/snowflake-cortex/cortex-agents/api-reference
-with tab4:
+def cortex_chat_page():
     st.header("💬 Ask the Credit Portfolio Analyst")
     st.caption("Natural language queries powered by Cortex Agent via REST API")
     
@@ -337,47 +802,51 @@ with tab4:
         st.session_state.chat_messages = []
     if "agent_thread_id" not in st.session_state:
         st.session_state.agent_thread_id = None
+    # A cached answer opens no agent thread, so the cached exchange is replayed
+    # as context until a live response starts one
+    if "agent_context" not in st.session_state:
+        st.session_state.agent_context = []
     
-    # Helper function to call Cortex Agent REST API
-    @st.cache_resource
-    def get_session_token():
-        """Cache the session token for authentication"""
-        return session.sql("SELECT SYSTEM$GET_SNOWSIGHT_HOST() as host, CURRENT_ACCOUNT() as account").collect()
+    TIMEOUT_MESSAGE = "Request timed out. The agent may be processing a complex query. Try a simpler question."
+    
+    def describe_http_error(response):
+        """Map an agent HTTP error status to a user-facing message."""
+        status = response.status_code
+        if status == 404:
+            return "Agent not found. Verify deployment and permissions."
+        elif status == 403:
+            return "Access denied. Grant USAGE on agent to your role:\n```sql\nGRANT USAGE ON AGENT snowflake_intelligence.agents.CREDIT_PORTFOLIO_ANALYST TO ROLE <your_role>;\n```"
+        elif status == 401:
+            return "Authentication failed. Please refresh your session."
+        elif status == 500:
+            return "Server error. Check agent configuration and try again."
+        else:
+            return f"HTTP {status}: {response.text}"
     
-    def call_cortex_agent(user_message, thread_id=None):
+    def call_cortex_agent(user_message, thread_id=None, context=None):
         """
         Call Cortex Agent using REST API following Snowflake best practices.
         
+        Only the request is made here; the open SSE stream is handed back so the
+        caller can render tokens as they arrive via stream_agent_response().
+        
         Args:
             user_message (str): User's question
             thread_id (str, optional): Thread ID for conversation context
+            context (list, optional): Earlier messages to replay when there is no thread yet
             
         Returns:
-            tuple: (response_text, thread_id, error_message)
+            tuple: (response, error_message) where response is a streaming requests.Response
         """
         import requests
-        import json
         
         try:
-            # Get Snowflake session context
-            conn_info = get_session_token()
-            
-            # Build REST API endpoint
-            # Format: https://<account>.snowflakecomputing.com/api/v2/databases/{db}/schemas/{schema}/agents/{name}:run
-            account = session.sql("SELECT CURRENT_ACCOUNT()").collect()[0][0]
-            region = session.sql("SELECT CURRENT_REGION()").collect()[0][0]
-            
-            # Construct base URL
-            if 'AWS_' in region:
-                host = f"{account.lower()}.snowflakecomputing.com"
-            else:
-                host = f"{account.lower()}.{region.lower()}.snowflakecomputing.com"
-            
-            agent_url = f"https://{host}/api/v2/databases/SNOWFLAKE_INTELLIGENCE/schemas/AGENTS/agents/CREDIT_PORTFOLIO_ANALYST:run"
+            client = get_agent_client(id(session), run_rows)
             
             # Build request payload
             payload = {
                 "messages": [
+                    *(context or []),
                     {"role": "user", "content": user_message}
                 ]
             }
@@ -386,156 +855,224 @@ with tab4:
             if thread_id:
                 payload["thread_id"] = thread_id
             
-            # Get authentication token
-            # In Streamlit in Snowflake, we use the user's session credentials
-            token = session.sql("SELECT SYSTEM$GET_SNOWSIGHT_HOST()").collect()[0][0]
-            
-            headers = {
-                "Authorization": f"Snowflake Token=\"{session.sql('SELECT CURRENT_SESSION()').collect()[0][0]}\"",
-                "Content-Type": "application/json",
-                "Accept": "text/event-stream"  # SSE format
-            }
-            
-            # Make REST API call with streaming enabled
-            response = requests.post(
-                agent_url,
-                json=payload,
-                headers=headers,
-                stream=True,
-                timeout=60
-            )
-            
-            # Check for HTTP errors
-            response.raise_for_status()
-            
-            # Parse Server-Sent Events (SSE) streaming response
-            response_text = ""
-            new_thread_id = thread_id
-            
-            for line in response.iter_lines():
-                if line:
-                    line_str = line.decode('utf-8')
-                    
-                    # SSE format: "data: {json}"
-                    if line_str.startswith('data: '):
-                        data_json = line_str[6:]  # Remove 'data: ' prefix
-                        
-                        # Check for stream completion
-                        if data_json.strip() == '[DONE]':
-                            break
-                        
-                        try:
-                            event_data = json.loads(data_json)
-                            
-                            # Extract thread_id from first response (for conversation persistence)
-                            if 'thread_id' in event_data and not new_thread_id:
-                                new_thread_id = event_data['thread_id']
-                            
-                            # Extract message content
-                            if 'message' in event_data:
-                                msg = event_data['message']
-                                if 'content' in msg:
-                                    content = msg['content']
-                                    
-                                    # Handle both string and list formats
-                                    if isinstance(content, list):
-                                        for item in content:
-                                            if isinstance(item, dict) and 'text' in item:
-                                                response_text += item['text']
-                                            elif isinstance(item, str):
-                                                response_text += item
-                                    elif isinstance(content, str):
-                                        response_text += content
-                            
-                            # Handle delta updates (streaming tokens)
-                            elif 'delta' in event_data and 'content' in event_data['delta']:
-                                response_text += event_data['delta']['content']
-                        
-                        except json.JSONDecodeError:
-                            continue
-            
-            return (response_text, new_thread_id, None)
+            return (client.run(payload, run_rows), None)
         
         except requests.exceptions.HTTPError as e:
-            status = e.response.status_code
-            if status == 404:
-                return (None, None, "Agent not found. Verify deployment and permissions.")
-            elif status == 403:
-                return (None, None, "Access denied. Grant USAGE on agent to your role:\n```sql\nGRANT USAGE ON AGENT snowflake_intelligence.agents.CREDIT_PORTFOLIO_ANALYST TO ROLE <your_role>;\n```")
-            elif status == 401:
-                return (None, None, "Authentication failed. Please refresh your session.")
-            elif status == 500:
-                return (None, None, "Server error. Check agent configuration and try again.")
-            else:
-                return (None, None, f"HTTP {status}: {e.response.text}")
+            return (None, describe_http_error(e.response))
         
         except requests.exceptions.Timeout:
-            return (None, None, "Request timed out. The agent may be processing a complex query. Try a simpler question.")
+            return (None, TIMEOUT_MESSAGE)
         
         except requests.exceptions.RequestException as e:
-            return (None, None, f"Network error: {str(e)}")
+            return (None, f"Network error: {str(e)}")
         
         except Exception as e:
-            return (None, None, f"Unexpected error: {str(e)}")
-    
-    # Sample questions with click-to-use functionality
-    with st.expander("💡 Sample Questions (Click to Use)", expanded=False):
-        sample_questions = [
-            "Create a table of financial metrics for HealthTech Solutions",
-            "Show me all of John Williams's deals in the watchlist",
-            "List deals where commitment changed more than 2% between now and March 31st",
-            "For each month-end starting from the beginning of the current year, what is the total exposure?",
-            "Total count of deals for ACME",
-            "What is the total fair value for top 10 deals"
-        ]
-        
-        for i, question in enumerate(sample_questions, 1):
-            if st.button(f"{i}. {question}", key=f"sample_{i}", use_container_width=True):
-                st.session_state.pending_question = question
-                st.rerun()
-    
-    # Reset conversation (clears thread and history)
-    col1, col2 = st.columns([5, 1])
-    with col2:
-        if st.button("🔄 Reset", help="Clear conversation and start fresh", use_container_width=True):
-            st.session_state.chat_messages = []
-            st.session_state.agent_thread_id = None
-            st.rerun()
+            return (None, f"Unexpected error: {str(e)}")
     
-    st.divider()
+    def stream_agent_response(response, reader):
+        """
+        Decode the agent's Server-Sent Events stream and yield text deltas as they arrive.
+        
+        Designed to be passed straight to st.write_stream. Framing and event
+        dispatch live in sse.AgentStreamReader, which also collects the thread
+        ID, tool calls and result tables; transport errors are recorded on it
+        because a generator can only hand text back to the renderer.
+        
+        Args:
+            response (requests.Response): Open streaming response from call_cortex_agent
+            reader (AgentStreamReader): Receives thread_id, tables and error
+        """
+        import requests
+        
+        try:
+            yield from reader.iter_text(response.iter_content(chunk_size=None))
+        
+        except requests.exceptions.Timeout:
+            reader.error = TIMEOUT_MESSAGE
+        
+        except requests.exceptions.RequestException as e:
+            reader.error = f"Network error: {str(e)}"
+        
+        finally:
+            response.close()
     
-    # Display chat history
-    for message in st.session_state.chat_messages:
-        with st.chat_message(message["role"]):
-            st.markdown(message["content"])
-    
-    # Handle pending question from sample button
-    prompt = None
-    if "pending_question" in st.session_state:
-        prompt = st.session_state.pending_question
-        del st.session_state.pending_question
-    
-    # Chat input
-    if prompt is None:
-        prompt = st.chat_input("Ask a question about the credit portfolio...")
-    
-    # Process user input
-    if prompt:
-        # Display user message
-        with st.chat_message("user"):
-            st.markdown(prompt)
-        
-        # Add to history
-        st.session_state.chat_messages.append({"role": "user", "content": prompt})
-        
-        # Call agent and display response
-        with st.chat_message("assistant"):
-            with st.spinner("🤔 Analyzing your question..."):
-                response_text, thread_id, error = call_cortex_agent(
-                    prompt, 
-                    st.session_state.agent_thread_id
-                )
+    # Shared answer cache (sql/04_cortex/03_create_answer_cache.sql). Each app
+    # instance also keeps an in-memory LRU; the table lets instances share
+    # answers. Lookups fail soft so the chat still works if it is not deployed.
+    ANSWER_CACHE_TTL_SECONDS = 6 * 3600
+    ANSWER_CACHE_LOOKUP_SQL = """
+    SELECT answer_text, answer_tables
+    FROM SNOWFLAKE_EXAMPLE.SFE_ANALYTICS_CREDIT.AGENT_ANSWER_CACHE
+    WHERE prompt_key = ?
+      AND data_version = ?
+      AND created_at >= DATEADD(second, -?, CURRENT_TIMESTAMP())
+    """
+    ANSWER_CACHE_HIT_SQL = """
+    UPDATE SNOWFLAKE_EXAMPLE.SFE_ANALYTICS_CREDIT.AGENT_ANSWER_CACHE
+    SET hit_count = hit_count + 1
+    WHERE prompt_key = ? AND data_version = ?
+    """
+    ANSWER_CACHE_STORE_SQL = """
+    MERGE INTO SNOWFLAKE_EXAMPLE.SFE_ANALYTICS_CREDIT.AGENT_ANSWER_CACHE t
+    USING (
+        SELECT ? AS prompt_key, ? AS data_version, ? AS answer_text, PARSE_JSON(?) AS answer_tables
+    ) s
+    ON t.prompt_key = s.prompt_key AND t.data_version = s.data_version
+    WHEN MATCHED THEN UPDATE SET
+        answer_text = s.answer_text,
+        answer_tables = s.answer_tables,
+        created_at = CURRENT_TIMESTAMP(),
+        hit_count = 0
+    WHEN NOT MATCHED THEN INSERT (prompt_key, data_version, answer_text, answer_tables)
+        VALUES (s.prompt_key, s.data_version, s.answer_text, s.answer_tables)
+    """
+    
+    @st.cache_resource(show_spinner=False)
+    def get_answer_cache():
+        """Process-wide LRU of first-turn answers, shared by every viewer of this app instance."""
+        return AnswerCache(max_entries=256, ttl_seconds=ANSWER_CACHE_TTL_SECONDS)
+    
+    def lookup_cached_answer(cache_key):
+        """Return a cached {text, tables} answer from memory or the shared table, or None."""
+        import json
+        
+        answer_cache = get_answer_cache()
+        answer = answer_cache.get(cache_key)
+        if answer is not None:
+            return answer
+        
+        try:
+            rows = run_rows(ANSWER_CACHE_LOOKUP_SQL, [*cache_key, ANSWER_CACHE_TTL_SECONDS])
+            if not rows:
+                return None
+            run_rows(ANSWER_CACHE_HIT_SQL, cache_key)
+        except Exception:
+            return None
+        
+        answer = {
+            'text': rows[0]['ANSWER_TEXT'],
+            'tables': json.loads(rows[0]['ANSWER_TABLES']) if rows[0]['ANSWER_TABLES'] else [],
+        }
+        answer_cache.put(cache_key, answer)
+        return answer
+    
+    def store_cached_answer(cache_key, answer):
+        """Remember an answer in memory and, best effort, in the shared table."""
+        import json
+        
+        get_answer_cache().put(cache_key, answer)
+        try:
+            run_rows(ANSWER_CACHE_STORE_SQL, [*cache_key, answer['text'], json.dumps(answer['tables'])])
+        except Exception:
+            pass
+    
+    def render_agent_tables(tables):
+        """Render result tables from Cortex Analyst tool calls."""
+        for table in tables:
+            if table.get('title'):
+                st.caption(table['title'])
+            st.dataframe(agent_table_to_frame(table), use_container_width=True)
+    
+    def agent_table_to_frame(table):
+        """Convert a response.table event's result_set into a DataFrame."""
+        result_set = table.get('result_set', {})
+        columns = [column['name'] for column in result_set.get('resultSetMetaData', {}).get('rowType', [])]
+        return pd.DataFrame(result_set.get('data', []), columns=columns or None)
+    
+    # Chat runs as a fragment: sending a message, picking a sample question or
+    # resetting reruns only this panel, not the page around it.
+    @st.fragment
+    def chat_panel():
+        # Sample questions with click-to-use functionality
+        with st.expander("💡 Sample Questions (Click to Use)", expanded=False):
+            sample_questions = [
+                "Create a table of financial metrics for HealthTech Solutions",
+                "Show me all of John Williams's deals in the watchlist",
+                "List deals where commitment changed more than 2% between now and March 31st",
+                "For each month-end starting from the beginning of the current year, what is the total exposure?",
+                "Total count of deals for ACME",
+                "What is the total fair value for top 10 deals"
+            ]
+        
+            for i, question in enumerate(sample_questions, 1):
+                if st.button(f"{i}. {question}", key=f"sample_{i}", use_container_width=True):
+                    st.session_state.pending_question = question
+                    st.rerun(scope="fragment")
+    
+        # Reset conversation (clears thread and history)
+        col1, col2 = st.columns([5, 1])
+        with col2:
+            if st.button("🔄 Reset", help="Clear conversation and start fresh", use_container_width=True):
+                st.session_state.chat_messages = []
+                st.session_state.agent_thread_id = None
+                st.session_state.agent_context = []
+                st.rerun(scope="fragment")
+    
+        st.divider()
+    
+        # Display chat history
+        for message in st.session_state.chat_messages:
+            with st.chat_message(message["role"]):
+                st.markdown(message["content"])
+    
+        # Handle pending question from sample button
+        prompt = None
+        if "pending_question" in st.session_state:
+            prompt = st.session_state.pending_question
+            del st.session_state.pending_question
+    
+        # Chat input
+        if prompt is None:
+            prompt = st.chat_input("Ask a question about the credit portfolio...")
+    
+        # Process user input
+        if prompt:
+            # Display user message
+            with st.chat_message("user"):
+                st.markdown(prompt)
+        
+            # Only opening questions are cacheable: follow-ups depend on thread context
+            cache_key = None
+            if st.session_state.agent_thread_id is None and not st.session_state.chat_messages:
+                cache_key = AnswerCache.key(prompt, get_data_version())
+        
+            # Add to history
+            st.session_state.chat_messages.append({"role": "user", "content": prompt})
+        
+            # Serve a cached answer, or call the agent and stream the response as it arrives
+            with st.chat_message("assistant"), recorder.span("cortex_agent", kind="agent") as agent_event:
+                cached_answer = lookup_cached_answer(cache_key) if cache_key else None
+                if cache_key:
+                    agent_event['cache_hit'] = cached_answer is not None
+            
+                response_text = None
+                error = None
+                reader = None
+                if cached_answer:
+                    response_text = cached_answer['text']
+                    st.markdown(response_text)
+                    render_agent_tables(cached_answer['tables'])
+                    st.caption("⚡ Cached answer for the current data snapshot")
+                else:
+                    with st.spinner("🤔 Analyzing your question..."):
+                        response, error = call_cortex_agent(
+                            prompt, 
+                            st.session_state.agent_thread_id,
+                            st.session_state.agent_context if st.session_state.agent_thread_id is None else None
+                        )
                 
+                    if not error:
+                        reader = AgentStreamReader(st.session_state.agent_thread_id)
+                        response_text = st.write_stream(
+                            telemetry.trace_stream(stream_agent_response(response, reader), agent_event)
+                        )
+                        error = reader.error
+                        agent_event['rows'] = len(reader.tables)
+                        render_agent_tables(reader.tables)
+                    
+                        if cache_key and response_text and not error:
+                            store_cached_answer(cache_key, {'text': response_text, 'tables': reader.tables})
+            
                 if error:
                     # Display error with helpful context
                     st.error(f"❌ {error}")
@@ -544,13 +1081,17 @@ with tab4:
                         "content": f"❌ {error}"
                     })
                 elif response_text:
-                    # Success - display response
-                    st.markdown(response_text)
-                    
-                    # Update thread ID for conversation continuity
-                    if thread_id:
-                        st.session_state.agent_thread_id = thread_id
-                    
+                    # Update thread ID for conversation continuity; once the agent
+                    # holds the thread, replayed context is no longer needed
+                    if reader and reader.thread_id:
+                        st.session_state.agent_thread_id = reader.thread_id
+                        st.session_state.agent_context = []
+                    elif st.session_state.agent_thread_id is None:
+                        st.session_state.agent_context += [
+                            {"role": "user", "content": prompt},
+                            {"role": "assistant", "content": response_text},
+                        ]
+                
                     # Add to history
                     st.session_state.chat_messages.append({
                         "role": "assistant",
@@ -564,6 +1105,23 @@ with tab4:
                         "role": "assistant",
                         "content": warning_msg
                     })
+        
+        record_telemetry()
+    
+    chat_panel()
+
+# Header
+st.title("📊 Capitol Kings Credit Portfolio Dashboard")
+st.caption("🔒 Credit portfolio analytics powered by Snowflake Intelligence")
+
+page = st.navigation([
+    st.Page(portfolio_summary_page, title="Portfolio Summary", icon="📊", default=True),
+    st.Page(deal_analysis_page, title="Deal Analysis", icon="💼"),
+    st.Page(deal_changes_page, title="Deal Changes", icon="🔀"),
+    st.Page(time_series_page, title="Time Series", icon="📈"),
+    st.Page(cortex_chat_page, title="Cortex Chat", icon="💬"),
+])
+page.run()
 
 # Footer
 st.divider()
@@ -574,3 +1132,26 @@ with col2:
     st.caption("🏗️ **Tech Stack:** Snowflake Cortex AI, Streamlit in Snowflake")
 with col3:
     st.caption(f"⏰ **Last Updated:** {datetime.now().strftime('%Y-%m-%d %H:%M')}")
+
+# Performance debug panel: this run's loader, statement and agent timings
+with st.sidebar:
+    if st.toggle("🔧 Performance debug", key="telemetry_debug"):
+        events = recorder.records()
+        try:
+            telemetry.enrich(session, events)
+        except Exception:
+            st.caption("Server timings unavailable (QUERY_HISTORY_BY_SESSION not accessible).")
+        st.dataframe(
+            pd.DataFrame(events, columns=telemetry.EVENT_FIELDS),
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                'wall_ms': st.column_config.NumberColumn(format="%.1f"),
+                'server_ms': st.column_config.NumberColumn(format="%.1f"),
+                'transfer_ms': st.column_config.NumberColumn(format="%.1f"),
+                'ttft_ms': st.column_config.NumberColumn(format="%.1f"),
+            },
+        )
+        st.caption("Cache hits issue no statements. transfer_ms = wall_ms − server_ms (fetch and to_pandas).")
+
+record_telemetry()
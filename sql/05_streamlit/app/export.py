@@ -0,0 +1,167 @@
+"""
+Bounded-memory exports of dashboard data.
+
+write_export() streams a query's result into a local CSV or Parquet file one
+result batch at a time, so writing holds only one batch in memory. Serving the
+file is another matter: st.download_button reads the whole file into the
+Streamlit server's media file manager and keeps it there while the button is
+shown. In-app downloads are therefore small by design, capped at
+EXPORT_MAX_ROWS (bound into the statement's trailing LIMIT so the warehouse
+never sends more) and EXPORT_MAX_BYTES of written file. An export past either
+cap is discarded and write_export() returns None.
+
+Those extracts go through unload_to_stage(), which runs the same statement
+without a limit and COPYs its result into one file on the SFE_DASHBOARD_EXPORTS
+stage (sql/05_streamlit/04_create_export_stage.sql) entirely in the warehouse,
+then returns a presigned download URL. No rows pass through the app.
+
+Like loaders.py, write_export() only needs sql(...).to_pandas_batches() and
+columns, so the offline benchmark harness runs it too; unload_to_stage() needs
+a Snowpark session.
+"""
+
+import os
+import re
+import tempfile
+from collections import namedtuple
+from contextlib import closing
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+EXPORT_MAX_ROWS = 50_000
+EXPORT_MAX_BYTES = 20_000_000
+EXPORT_STAGE = '@SNOWFLAKE_EXAMPLE.SFE_ANALYTICS_CREDIT.SFE_DASHBOARD_EXPORTS'
+EXPORT_URL_EXPIRY_SECONDS = 3600
+
+# Local file suffix and MIME type, stage file suffix and COPY file format
+ExportFormat = namedtuple('ExportFormat', ['suffix', 'mime', 'stage_suffix', 'file_format'])
+
+EXPORT_FORMATS = {
+    'CSV': ExportFormat('.csv', 'text/csv', '.csv.gz',
+                        "TYPE = CSV COMPRESSION = GZIP FIELD_OPTIONALLY_ENCLOSED_BY = '\"' NULL_IF = ('')"),
+    'Parquet': ExportFormat('.parquet', 'application/vnd.apache.parquet', '.parquet', 'TYPE = PARQUET'),
+}
+
+# The unload reads a finished query's result with RESULT_SCAN, so the export
+# statement itself keeps its canonical text and bind values. COPY INTO takes
+# neither the target path nor the query ID as a bind; both are generated (by
+# the app and by Snowflake) and checked against SAFE_TOKEN before formatting.
+UNLOAD_SQL = """
+COPY INTO {stage}/{path}
+FROM (SELECT * FROM TABLE(RESULT_SCAN('{query_id}')))
+FILE_FORMAT = ({file_format})
+HEADER = TRUE
+SINGLE = TRUE
+MAX_FILE_SIZE = 5368709120
+OVERWRITE = TRUE
+"""
+
+PRESIGNED_URL_SQL = f'SELECT GET_PRESIGNED_URL({EXPORT_STAGE}, ?, ?) AS url'
+
+SAFE_TOKEN = re.compile(r'[\w-]+')
+
+# A finished local export; the caller removes path once it has been served
+ExportFile = namedtuple('ExportFile', ['path', 'rows', 'size'])
+
+# A file on the export stage and its presigned URL
+StageExport = namedtuple('StageExport', ['path', 'url', 'rows', 'size'])
+
+class CsvWriter:
+    def __init__(self, path):
+        self._file = open(path, 'w', newline='', encoding='utf-8')
+        self._header = True
+
+    def write(self, batch):
+        batch.to_csv(self._file, header=self._header, index=False)
+        self._header = False
+
+    def size(self):
+        return self._file.tell()
+
+    def close(self):
+        self._file.close()
+
+class ParquetWriter:
+    """One row group per batch; later batches are cast to the first batch's schema."""
+
+    def __init__(self, path):
+        self._path = path
+        self._writer = None
+
+    def write(self, batch):
+        if self._writer is None:
+            table = pa.Table.from_pandas(batch, preserve_index=False)
+            self._writer = pq.ParquetWriter(self._path, table.schema)
+        else:
+            table = pa.Table.from_pandas(batch, schema=self._writer.schema, preserve_index=False)
+        self._writer.write_table(table)
+
+    def size(self):
+        return os.path.getsize(self._path)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+
+WRITERS = {'CSV': CsvWriter, 'Parquet': ParquetWriter}
+
+def write_export(session, statement, params, export_format, max_rows=EXPORT_MAX_ROWS, max_bytes=EXPORT_MAX_BYTES):
+    """
+    Write the statement's result to a temporary file, one result batch at a
+    time. The statement must end in LIMIT ?, which is bound to max_rows + 1 so
+    an over-long result is detected. Returns None, with the file removed, once
+    the result passes max_rows rows or the file passes max_bytes.
+    """
+    frame = session.sql(statement, params=[*params, max_rows + 1])
+    handle, path = tempfile.mkstemp(prefix='dashboard-export-', suffix=EXPORT_FORMATS[export_format].suffix)
+    os.close(handle)
+    writer = WRITERS[export_format](path)
+    rows, fits = 0, True
+    try:
+        # Closed explicitly, so stopping at a cap ends the fetch (and records
+        # the statement in telemetry) before the file is removed
+        with closing(frame.to_pandas_batches()) as batches:
+            for batch in batches:
+                rows += len(batch)
+                if rows > max_rows:
+                    fits = False
+                    break
+                if not batch.empty:
+                    writer.write(batch)
+                if writer.size() > max_bytes:
+                    fits = False
+                    break
+        if rows == 0:
+            writer.write(pd.DataFrame(columns=frame.columns))
+    except BaseException:
+        writer.close()
+        os.remove(path)
+        raise
+    writer.close()
+    if not fits:
+        os.remove(path)
+        return None
+    return ExportFile(path, rows, os.path.getsize(path))
+
+def unload_to_stage(session, statement, params, export_format, export_id, name):
+    """
+    Run the statement with no row limit and COPY its result into
+    <export_id>/<name><suffix> on the export stage. The result is never
+    fetched to the app; the file is served by a presigned URL valid for
+    EXPORT_URL_EXPIRY_SECONDS.
+    """
+    job = session.sql(statement, params=[*params, None]).collect_nowait()
+    job.result(result_type='no_result')
+    for token in (job.query_id, export_id, name):
+        if not SAFE_TOKEN.fullmatch(token):
+            raise ValueError(f'Unsafe export path component: {token!r}')
+
+    export_format = EXPORT_FORMATS[export_format]
+    path = f'{export_id}/{name}{export_format.stage_suffix}'
+    unloaded = session.sql(UNLOAD_SQL.format(
+        stage=EXPORT_STAGE, path=path, query_id=job.query_id, file_format=export_format.file_format
+    )).collect()[0]
+    url = session.sql(PRESIGNED_URL_SQL, params=[path, EXPORT_URL_EXPIRY_SECONDS]).collect()[0]['URL']
+    return StageExport(path, url, unloaded['ROWS_UNLOADED'], unloaded['OUTPUT_BYTES'])
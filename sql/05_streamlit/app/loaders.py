@@ -0,0 +1,556 @@
+"""
+Dashboard data loaders.
+
+Every query the dashboard runs and every in-memory derivation of its results
+lives here, with the Snowpark session passed in explicitly. app.py wraps these
+functions in its Streamlit caches and binds the active session; the offline
+benchmark harness (benchmarks/loader_bench.py) calls the same functions with a
+local stand-in session, so both measure exactly the code the dashboard runs.
+
+A session only needs sql(text, params=[...]) returning an object with
+to_pandas_batches(), columns and collect().
+"""
+
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+# Statement layer
+# Every dashboard query is a module-level constant executed through run_query /
+# run_rows. Values are passed as qmark bind parameters, never formatted into the
+# text, so each query shape has exactly one canonical text and repeated calls
+# reuse Snowflake's compiled plan and result cache.
+# Dashboard queries read the dynamic-table rollups from
+# sql/03_transformations/04_create_rollups.sql rather than the raw fact table.
+# One snapshot date only: the date_id filter prunes to that day's
+# micro-partitions, so switching the as-of date never reads the rest of the
+# history. The () grouping set adds the exact portfolio total row, which is
+# returned even when the date has no positions.
+SNAPSHOT_SQL = """
+SELECT
+    GROUPING(deal_id) AS is_total,
+    deal_id,
+    deal_name,
+    company_name,
+    industry,
+    watchlist,
+    rating,
+    originator1,
+    deal_date,
+    SUM(total_exposure) AS total_exposure,
+    SUM(total_commitment) AS total_commitment,
+    SUM(total_fair_value) AS total_fair_value,
+    SUM(mark_sum) / NULLIF(SUM(mark_count), 0) AS average_mark,
+    COUNT(DISTINCT deal_id) AS deal_count,
+    COUNT(DISTINCT company_id) AS company_count
+FROM SNOWFLAKE_EXAMPLE.SFE_ANALYTICS_CREDIT.DT_DEAL_DAILY
+WHERE date_id = ?
+GROUP BY GROUPING SETS (
+    (deal_id, deal_name, company_name, industry,
+     watchlist, rating, originator1, deal_date),
+    ()
+)
+"""
+
+# Freshness banner figures over the whole history. The distinct counts cannot
+# be answered from metadata, so this scans every date; it takes no binds and is
+# cached per data version, so it runs once per load rather than per as-of date.
+DATA_FRESHNESS_SQL = """
+SELECT
+    MAX(calendar_date) AS latest_date,
+    COUNT(DISTINCT deal_id) AS overall_deal_count,
+    COUNT(DISTINCT company_id) AS overall_company_count
+FROM SNOWFLAKE_EXAMPLE.SFE_ANALYTICS_CREDIT.DT_DEAL_DAILY
+"""
+
+# Month-end trend over an arbitrary range of the full history. Window
+# aggregates run over every month-end before QUALIFY trims the range, so the
+# first points of a range still have their MoM, YoY and rolling values. YoY
+# only pairs rows exactly twelve months apart, in case a month-end is missing.
+# The last binds keep every Nth month-end (1, 3, 6 or 12), counted back from
+# the end of the range so the latest point is always shown, to cap chart points
+# over long ranges. Month-end figures are balances, so a sampled row is that
+# period's value and nothing is lost by skipping the months between.
+EXPOSURE_TREND_SQL = """
+SELECT
+    month_end_date,
+    year,
+    month,
+    total_exposure,
+    total_commitment,
+    total_fair_value,
+    total_funded_par,
+    total_unfunded_par,
+    average_mark,
+    deal_count,
+    company_count,
+    total_exposure / NULLIF(LAG(total_exposure) OVER (ORDER BY month_end_date), 0) - 1 AS exposure_mom_pct,
+    CASE
+        WHEN LAG(year * 12 + month, 12) OVER (ORDER BY month_end_date) = year * 12 + month - 12
+        THEN total_exposure / NULLIF(LAG(total_exposure, 12) OVER (ORDER BY month_end_date), 0) - 1
+    END AS exposure_yoy_pct,
+    AVG(total_exposure) OVER (ORDER BY month_end_date ROWS BETWEEN 2 PRECEDING AND CURRENT ROW) AS exposure_3m_avg,
+    AVG(total_exposure) OVER (ORDER BY month_end_date ROWS BETWEEN 11 PRECEDING AND CURRENT ROW) AS exposure_12m_avg
+FROM SNOWFLAKE_EXAMPLE.SFE_ANALYTICS_CREDIT.DT_PORTFOLIO_MONTH_END
+QUALIFY month_end_date BETWEEN CAST(? AS DATE) AND CAST(? AS DATE)
+    AND MOD(YEAR(CAST(? AS DATE)) * 12 + MONTH(CAST(? AS DATE)) - (year * 12 + month), ?) = 0
+ORDER BY month_end_date
+"""
+
+# Snapshot dates that actually have positions, newest first. Facts only exist
+# for month-ends and load dates, so the as-of selector offers these rather than
+# calendar days that would render empty. DT_SNAPSHOT_DATES holds one row per
+# date, so this reads a few hundred rows however many deals each date has.
+SNAPSHOT_DATES_SQL = """
+SELECT
+    date_id,
+    calendar_date,
+    is_month_end
+FROM SNOWFLAKE_EXAMPLE.SFE_ANALYTICS_CREDIT.DT_SNAPSHOT_DATES
+ORDER BY date_id DESC
+"""
+
+# Deal-level changes between two snapshot dates, read from the precomputed
+# DT_DEAL_DELTAS rollup. Clustered on (date_id, anchor_date_id), so a change
+# question prunes to one pair's micro-partitions instead of self-joining the
+# fact history.
+DEAL_DELTAS_SQL = """
+SELECT
+    deal_id,
+    deal_name,
+    company_name,
+    industry,
+    watchlist,
+    originator1,
+    exposure,
+    anchor_exposure,
+    exposure_change,
+    exposure_pct_change,
+    commitment,
+    anchor_commitment,
+    commitment_change,
+    commitment_pct_change,
+    fair_value,
+    anchor_fair_value,
+    fair_value_change,
+    fair_value_pct_change
+FROM SNOWFLAKE_EXAMPLE.SFE_ANALYTICS_CREDIT.DT_DEAL_DELTAS
+WHERE date_id = ? AND anchor_date_id = ?
+"""
+
+# Cheap watermark for cache invalidation, taken on the rollup the dashboard reads
+# so a new version only appears once the dynamic table has refreshed. MAX and
+# COUNT(*) over the whole table are answered from micro-partition metadata,
+# SYSTEM$LAST_CHANGE_COMMIT_TIME catches in-place updates, and CURRENT_DATE()
+# rolls the version at midnight. MAX(date_id) doubles as the default as-of date:
+# the latest snapshot that exists, which loaders filter on directly as the
+# date_id clustering key, so Snowflake prunes to a single day's micro-partitions.
+DATA_VERSION_SQL = """
+SELECT
+    CURRENT_DATE() AS as_of_date,
+    MAX(date_id) AS max_date_id,
+    MAX(calendar_date) AS max_date,
+    COUNT(*) AS row_count,
+    SYSTEM$LAST_CHANGE_COMMIT_TIME('SNOWFLAKE_EXAMPLE.SFE_ANALYTICS_CREDIT.DT_DEAL_DAILY') AS last_change
+FROM SNOWFLAKE_EXAMPLE.SFE_ANALYTICS_CREDIT.DT_DEAL_DAILY
+"""
+
+def run_query(session, statement, params=None):
+    """
+    Execute a canonical statement with bind parameters and return a pandas DataFrame.
+
+    Results are converted one Arrow result batch at a time, so the full
+    result never exists as one Arrow table and one DataFrame at once.
+    """
+    frame = session.sql(statement, params=list(params) if params else None)
+    batches = list(frame.to_pandas_batches())
+    if not batches:
+        return pd.DataFrame(columns=frame.columns)
+    if len(batches) == 1:
+        return batches[0]
+    return pd.concat(batches, ignore_index=True)
+
+def run_rows(session, statement, params=None):
+    """Execute a canonical statement with bind parameters and return Snowpark Rows."""
+    return session.sql(statement, params=list(params) if params else None).collect()
+
+# Compact dtypes
+# Cached frames are held per data version in every app instance, so per-deal
+# results are stored compactly: low-cardinality labels as categoricals and
+# measures as float32 (about seven significant digits, ample for per-deal
+# figures shown in $M). Portfolio totals come from the server-side total row
+# and stay float64, so the headline KPIs are exact; anything summed from the
+# per-deal rows is upcast to float64 first so the error does not accumulate.
+CATEGORY_COLUMNS = ['WATCHLIST', 'ORIGINATOR1', 'INDUSTRY']
+DEAL_MEASURE_COLUMNS = ['TOTAL_EXPOSURE', 'TOTAL_COMMITMENT', 'TOTAL_FAIR_VALUE', 'AVERAGE_MARK']
+
+# The snapshot's total row has NULL deal keys, which turns the integer columns
+# of the whole result into float64; the deal rows are cast back once it is split
+# off. RATING is nullable on DIM_DEAL, so it becomes pandas' nullable Int64.
+DEAL_INTEGER_COLUMNS = {'DEAL_ID': np.int64, 'RATING': 'Int64', 'DEAL_COUNT': np.int64, 'COMPANY_COUNT': np.int64}
+
+def compact_deals(frame):
+    dtypes = {column: 'category' for column in CATEGORY_COLUMNS}
+    dtypes.update({column: np.float32 for column in DEAL_MEASURE_COLUMNS})
+    return frame.astype({column: dtype for column, dtype in dtypes.items() if column in frame.columns})
+
+def to_python(value):
+    """Unwrap numpy scalars so values bind as query parameters and hash stably."""
+    return value.item() if isinstance(value, np.generic) else value
+
+# Loaders
+def load_data_version(session):
+    """Return a watermark that changes whenever the rollup data or the date changes."""
+    row = run_query(session, DATA_VERSION_SQL).iloc[0]
+    return {
+        'as_of_date': to_python(row['AS_OF_DATE']),
+        'max_date_id': to_python(row['MAX_DATE_ID']),
+        'max_date': to_python(row['MAX_DATE']),
+        'row_count': to_python(row['ROW_COUNT']),
+        'last_change': to_python(row['LAST_CHANGE']),
+    }
+
+def load_data_freshness(session):
+    """Latest snapshot date and distinct deal and company counts across all dates."""
+    row = run_query(session, DATA_FRESHNESS_SQL).iloc[0]
+    return {
+        'latest_date': to_python(row['LATEST_DATE']),
+        'overall_deal_count': to_python(row['OVERALL_DEAL_COUNT']),
+        'overall_company_count': to_python(row['OVERALL_COMPANY_COUNT']),
+    }
+
+# One snapshot date, split into compact per-deal rows and the exact portfolio
+# totals (None when the date has no positions)
+Snapshot = namedtuple('Snapshot', ['deals', 'totals'])
+
+def load_snapshot_dates(session):
+    """Snapshot dates with positions, newest first (DATE_ID, CALENDAR_DATE, IS_MONTH_END)."""
+    return run_query(session, SNAPSHOT_DATES_SQL)
+
+def load_snapshot(session, date_id):
+    """
+    Load one snapshot date's deal-level positions in a single warehouse round trip.
+
+    GROUPING SETS returns one row per deal plus a grand-total row (IS_TOTAL = 1)
+    carrying the exact portfolio KPIs. The rest of the snapshot views are
+    derived from this result in memory.
+    """
+    frame = run_query(session, SNAPSHOT_SQL, [date_id])
+    return split_snapshot(frame)
+
+def split_snapshot(frame):
+    is_total = frame['IS_TOTAL'] == 1
+    totals = frame[is_total]
+    if totals.empty or pd.isna(totals.iloc[0]['TOTAL_EXPOSURE']):
+        totals = None
+    else:
+        totals = totals.iloc[0]
+    deals = frame[~is_total & frame['DEAL_ID'].notna()].drop(columns=['IS_TOTAL'])
+    deals = deals.astype({column: dtype for column, dtype in DEAL_INTEGER_COLUMNS.items() if column in deals.columns})
+    return Snapshot(compact_deals(deals).reset_index(drop=True), totals)
+
+def load_deal_deltas(session, date_id, anchor_date_id):
+    return compact_deals(run_query(session, DEAL_DELTAS_SQL, [date_id, anchor_date_id]))
+
+def load_exposure_trend(session, start_date, end_date, step=1):
+    """Month-end portfolio trend between two dates, keeping every step-th month-end."""
+    start_date, end_date = str(start_date), str(end_date)
+    return run_query(session, EXPOSURE_TREND_SQL, [start_date, end_date, end_date, end_date, step])
+
+# Snapshot derivations
+def get_portfolio_summary(snapshot):
+    return snapshot.totals
+
+def get_top_deals_by_exposure(snapshot, limit=10):
+    return snapshot.deals.nlargest(limit, 'TOTAL_EXPOSURE')[
+        ['DEAL_NAME', 'COMPANY_NAME', 'WATCHLIST', 'RATING',
+         'TOTAL_EXPOSURE', 'TOTAL_COMMITMENT', 'AVERAGE_MARK']
+    ].reset_index(drop=True)
+
+def get_exposure_by_industry(snapshot):
+    return (
+        snapshot.deals
+        .astype({'TOTAL_EXPOSURE': np.float64})
+        .groupby('INDUSTRY', as_index=False, observed=True)
+        .agg(TOTAL_EXPOSURE=('TOTAL_EXPOSURE', 'sum'), DEAL_COUNT=('DEAL_ID', 'nunique'))
+        .sort_values('TOTAL_EXPOSURE', ascending=False)
+        .reset_index(drop=True)
+    )
+
+# Deal Analysis filters
+# The originator options and the summary metrics are vectorized masks over the
+# cached snapshot's deal rows, so changing a filter never goes back to the
+# warehouse; only the grid page itself is fetched with keyset SQL below.
+ELEVATED_WATCHLIST = ['Watchlist', 'Intensive Care']
+
+def get_deal_originators(snapshot):
+    return ["All"] + sorted(snapshot.deals['ORIGINATOR1'].dropna().unique().tolist())
+
+def filter_deals(snapshot, watchlist_filter=None, originator_filter=None):
+    deals = snapshot.deals
+    mask = np.ones(len(deals), dtype=bool)
+    if watchlist_filter and watchlist_filter != "All":
+        mask &= (deals['WATCHLIST'] == watchlist_filter).to_numpy()
+    if originator_filter and originator_filter != "All":
+        mask &= (deals['ORIGINATOR1'] == originator_filter).to_numpy()
+    return deals[mask]
+
+def get_deal_summary(snapshot, watchlist_filter=None, originator_filter=None):
+    deals = filter_deals(snapshot, watchlist_filter, originator_filter)
+    return {
+        'deal_count': len(deals),
+        'average_exposure': deals['TOTAL_EXPOSURE'].astype(np.float64).mean(),
+        'watchlist_count': int(deals['WATCHLIST'].isin(ELEVATED_WATCHLIST).sum()),
+    }
+
+# Deal grid
+# The Deal Analysis grid is fetched one page at a time with keyset pagination:
+# each page continues strictly after the last (total_exposure, deal_id) of the
+# previous one, so every page costs the same no matter how deep it is or how
+# many deals the portfolio holds, and nothing beyond the page is transferred.
+# Optional filters bind NULL for "All", keeping a single canonical text.
+DEAL_FILTERS = """
+WHERE date_id = ?
+  AND (? IS NULL OR watchlist = ?)
+  AND (? IS NULL OR originator1 = ?)
+"""
+
+DEAL_PAGE_SQL = """
+SELECT
+    deal_id,
+    deal_name,
+    company_name,
+    watchlist,
+    rating,
+    originator1,
+    deal_date,
+    total_exposure,
+    total_fair_value
+FROM SNOWFLAKE_EXAMPLE.SFE_ANALYTICS_CREDIT.DT_DEAL_DAILY
+""" + DEAL_FILTERS + """
+  AND (? IS NULL OR total_exposure < ? OR (total_exposure = ? AND deal_id < ?))
+ORDER BY total_exposure DESC, deal_id DESC
+LIMIT ?
+"""
+
+# One deal's positions on one date, fetched only when the deal is selected.
+# GROUPING SETS returns its assets and, per asset, the fund/sponsor breakdown
+# in a single round trip; IS_HOLDER tells the two apart.
+DEAL_DRILLDOWN_SQL = """
+SELECT
+    GROUPING(funds.fund_id) = 0 AS is_holder,
+    assets.asset_id,
+    assets.asset_name,
+    assets.facility_type,
+    assets.security_type,
+    assets.maturity_date,
+    funds.fund_id,
+    funds.fund_name,
+    funds.fund_family,
+    funds.strategy_type,
+    sponsors.sponsor_name,
+    SUM(f.exposure) AS total_exposure,
+    SUM(f.commitment) AS total_commitment,
+    SUM(f.fair_value) AS total_fair_value,
+    SUM(f.funded_par) AS total_funded_par,
+    SUM(f.unfunded_par) AS total_unfunded_par,
+    AVG(f.mark) AS average_mark
+FROM SNOWFLAKE_EXAMPLE.SFE_ANALYTICS_CREDIT.FACT_POSITION_SNAPSHOT f
+JOIN SNOWFLAKE_EXAMPLE.SFE_ANALYTICS_CREDIT.DIM_ASSET assets ON f.asset_id = assets.asset_id
+JOIN SNOWFLAKE_EXAMPLE.SFE_ANALYTICS_CREDIT.DIM_FUND funds ON f.fund_id = funds.fund_id
+JOIN SNOWFLAKE_EXAMPLE.SFE_ANALYTICS_CREDIT.DIM_SPONSOR sponsors ON f.sponsor_id = sponsors.sponsor_id
+WHERE f.date_id = ? AND f.deal_id = ?
+GROUP BY GROUPING SETS (
+    (assets.asset_id, assets.asset_name, assets.facility_type,
+     assets.security_type, assets.maturity_date),
+    (assets.asset_id, assets.asset_name, assets.facility_type,
+     assets.security_type, assets.maturity_date,
+     funds.fund_id, funds.fund_name, funds.fund_family, funds.strategy_type,
+     sponsors.sponsor_name)
+)
+ORDER BY total_exposure DESC
+"""
+
+DEAL_PAGE_SIZE = 50
+ASSET_COLUMNS = [
+    'ASSET_NAME', 'FACILITY_TYPE', 'SECURITY_TYPE', 'MATURITY_DATE',
+    'TOTAL_EXPOSURE', 'TOTAL_COMMITMENT', 'TOTAL_FAIR_VALUE', 'AVERAGE_MARK'
+]
+HOLDER_COLUMNS = [
+    'FUND_NAME', 'FUND_FAMILY', 'STRATEGY_TYPE', 'SPONSOR_NAME',
+    'TOTAL_EXPOSURE', 'TOTAL_COMMITMENT', 'TOTAL_FAIR_VALUE', 'AVERAGE_MARK'
+]
+
+def deal_filter_params(date_id, watchlist_filter=None, originator_filter=None):
+    watchlist = watchlist_filter if watchlist_filter and watchlist_filter != "All" else None
+    originator = originator_filter if originator_filter and originator_filter != "All" else None
+    return [date_id, watchlist, watchlist, originator, originator]
+
+# One page of the deal grid; cursor is the next page's key (None on the last page)
+DealPage = namedtuple('DealPage', ['deals', 'cursor'])
+
+def load_deal_page(session, date_id, watchlist_filter=None, originator_filter=None,
+                   after=None, page_size=DEAL_PAGE_SIZE):
+    """
+    Load up to page_size deals ranked by exposure, starting after the
+    (total_exposure, deal_id) key `after` (None for the first page). One
+    extra row is fetched to tell whether another page follows.
+    """
+    exposure, deal_id = after if after else (None, None)
+    params = deal_filter_params(date_id, watchlist_filter, originator_filter)
+    params += [exposure, exposure, exposure, deal_id, page_size + 1]
+    # Kept at full precision: the cursor must match the stored key exactly
+    frame = run_query(session, DEAL_PAGE_SQL, params)
+    deals = frame.head(page_size)
+    cursor = None
+    if len(frame) > page_size:
+        last = deals.iloc[-1]
+        cursor = (to_python(last['TOTAL_EXPOSURE']), to_python(last['DEAL_ID']))
+    return DealPage(deals, cursor)
+
+# A deal's assets and each asset's fund/sponsor holders
+DealDrilldown = namedtuple('DealDrilldown', ['assets', 'holders'])
+
+def load_deal_drilldown(session, date_id, deal_id):
+    frame = run_query(session, DEAL_DRILLDOWN_SQL, [date_id, deal_id])
+    is_holder = frame['IS_HOLDER'].astype(bool)
+    return DealDrilldown(
+        frame.loc[~is_holder, ['ASSET_ID', *ASSET_COLUMNS]].reset_index(drop=True),
+        frame.loc[is_holder, ['ASSET_ID', *HOLDER_COLUMNS]].reset_index(drop=True),
+    )
+
+def get_asset_holders(drilldown, asset_id):
+    holders = drilldown.holders
+    return holders.loc[holders['ASSET_ID'] == asset_id, HOLDER_COLUMNS].reset_index(drop=True)
+
+# Exports
+# Every deal matching the Deal Analysis filters, and the position-level rows
+# behind them (optionally one deal's), for export.py. Both rank like the grid
+# and end in LIMIT ?: the in-app download binds its row cap + 1 so the
+# warehouse never sends more than can be written, and the stage unload binds
+# NULL, which Snowflake treats as no limit.
+DEAL_EXPORT_SQL = """
+SELECT
+    deal_id,
+    deal_name,
+    company_name,
+    industry,
+    watchlist,
+    rating,
+    originator1,
+    deal_date,
+    total_exposure,
+    total_commitment,
+    total_fair_value,
+    total_funded_par,
+    total_unfunded_par,
+    mark_sum / NULLIF(mark_count, 0) AS average_mark,
+    position_count
+FROM SNOWFLAKE_EXAMPLE.SFE_ANALYTICS_CREDIT.DT_DEAL_DAILY
+""" + DEAL_FILTERS + """
+ORDER BY total_exposure DESC, deal_id DESC
+LIMIT ?
+"""
+
+POSITION_EXPORT_SQL = """
+SELECT
+    dates.calendar_date,
+    f.deal_id,
+    deals.deal_name,
+    companies.company_name,
+    companies.industry,
+    deals.watchlist,
+    deals.originator1,
+    f.asset_id,
+    assets.asset_name,
+    assets.facility_type,
+    assets.security_type,
+    assets.maturity_date,
+    funds.fund_name,
+    funds.fund_family,
+    funds.strategy_type,
+    sponsors.sponsor_name,
+    f.exposure,
+    f.commitment,
+    f.fair_value,
+    f.funded_par,
+    f.unfunded_par,
+    f.cost,
+    f.mark
+FROM SNOWFLAKE_EXAMPLE.SFE_ANALYTICS_CREDIT.FACT_POSITION_SNAPSHOT f
+JOIN SNOWFLAKE_EXAMPLE.SFE_ANALYTICS_CREDIT.DIM_DATE dates ON f.date_id = dates.date_key
+JOIN SNOWFLAKE_EXAMPLE.SFE_ANALYTICS_CREDIT.DIM_DEAL deals ON f.deal_id = deals.deal_id
+JOIN SNOWFLAKE_EXAMPLE.SFE_ANALYTICS_CREDIT.DIM_COMPANY companies ON f.company_id = companies.company_id
+JOIN SNOWFLAKE_EXAMPLE.SFE_ANALYTICS_CREDIT.DIM_ASSET assets ON f.asset_id = assets.asset_id
+JOIN SNOWFLAKE_EXAMPLE.SFE_ANALYTICS_CREDIT.DIM_FUND funds ON f.fund_id = funds.fund_id
+JOIN SNOWFLAKE_EXAMPLE.SFE_ANALYTICS_CREDIT.DIM_SPONSOR sponsors ON f.sponsor_id = sponsors.sponsor_id
+WHERE f.date_id = ?
+  AND (? IS NULL OR deals.watchlist = ?)
+  AND (? IS NULL OR deals.originator1 = ?)
+  AND (? IS NULL OR f.deal_id = ?)
+ORDER BY f.deal_id, f.asset_id, f.fund_id
+LIMIT ?
+"""
+
+def deal_export_params(date_id, watchlist_filter=None, originator_filter=None):
+    """Binds for DEAL_EXPORT_SQL, less the trailing LIMIT."""
+    return deal_filter_params(date_id, watchlist_filter, originator_filter)
+
+def position_export_params(date_id, watchlist_filter=None, originator_filter=None, deal_id=None):
+    """Binds for POSITION_EXPORT_SQL, less the trailing LIMIT."""
+    return deal_filter_params(date_id, watchlist_filter, originator_filter) + [deal_id, deal_id]
+
+# Trend range
+TREND_MAX_POINTS = 60
+TREND_STEPS = {1: 'monthly', 3: 'every 3 months', 6: 'every 6 months', 12: 'yearly'}
+
+def get_month_ends(snapshot_dates):
+    """Month-end snapshot dates, oldest first."""
+    return sorted(snapshot_dates.loc[snapshot_dates['IS_MONTH_END'], 'CALENDAR_DATE'].tolist())
+
+def get_trend_step(month_count, max_points=TREND_MAX_POINTS):
+    """Smallest month-end step that keeps a range within max_points."""
+    return next((step for step in TREND_STEPS if month_count / step <= max_points), max(TREND_STEPS))
+
+# Change analysis
+DELTA_MEASURES = {'Commitment': 'COMMITMENT', 'Exposure': 'EXPOSURE', 'Fair Value': 'FAIR_VALUE'}
+
+def get_prior_month_end(snapshot_dates, date_id):
+    """Latest month-end snapshot before date_id, or None (snapshot_dates is newest first)."""
+    earlier = snapshot_dates[(snapshot_dates['DATE_ID'] < date_id) & snapshot_dates['IS_MONTH_END']]
+    return to_python(earlier['DATE_ID'].iloc[0]) if not earlier.empty else None
+
+# DT_DEAL_DELTAS only pairs a date with these anchors (see 04_create_rollups.sql)
+DELTA_ANCHOR_MONTHS = 24
+DELTA_ANCHOR_QUARTER_MONTHS = (3, 6, 9, 12)
+
+def get_delta_anchors(snapshot_dates, date_id):
+    """
+    Snapshot dates DT_DEAL_DELTAS holds changes against for date_id, newest
+    first: the previous snapshot, the prior month-end and the quarter-ends of
+    the trailing DELTA_ANCHOR_MONTHS.
+    """
+    calendar = pd.to_datetime(snapshot_dates['CALENDAR_DATE'])
+    current = calendar[snapshot_dates['DATE_ID'] == date_id]
+    earlier = snapshot_dates['DATE_ID'] < date_id
+    if current.empty or not earlier.any():
+        return snapshot_dates.iloc[0:0]
+    current = current.iloc[0]
+    prior_month_end = current.replace(day=1) - pd.Timedelta(days=1)
+    month_end_anchor = (
+        snapshot_dates['IS_MONTH_END'].astype(bool)
+        & (calendar >= current - pd.DateOffset(months=DELTA_ANCHOR_MONTHS))
+        & ((calendar == prior_month_end) | calendar.dt.month.isin(DELTA_ANCHOR_QUARTER_MONTHS))
+    )
+    previous = snapshot_dates['DATE_ID'] == snapshot_dates.loc[earlier, 'DATE_ID'].max()
+    return snapshot_dates[earlier & (month_end_anchor | previous)]
+
+def get_changed_deals(deltas, measure='COMMITMENT', threshold=0.02):
+    """Deals whose measure moved by more than threshold (a fraction), largest moves first."""
+    pct_change = f'{measure}_PCT_CHANGE'
+    changed = deltas[deltas[pct_change].abs() > threshold]
+    return changed.sort_values(pct_change, key=lambda column: column.abs(), ascending=False)[
+        ['DEAL_NAME', 'COMPANY_NAME', 'WATCHLIST', f'ANCHOR_{measure}', measure,
+         f'{measure}_CHANGE', pct_change]
+    ].reset_index(drop=True)
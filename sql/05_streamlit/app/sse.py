@@ -0,0 +1,239 @@
+"""
+Incremental Server-Sent Events decoding for the Cortex Agent REST API.
+
+SSEDecoder turns raw byte chunks (requests' iter_content) into complete events,
+following the WHATWG event-stream framing rules: CR, LF and CRLF line endings,
+multi-line data fields, comments, and event/id fields, with lines and multi-byte
+characters allowed to straddle chunk boundaries.
+
+AgentStreamReader sits on top of the decoder and dispatches Cortex Agent events
+by type: text deltas, tool use, table results and thread metadata. It keeps the
+answer in a list buffer and joins it only when the full text is requested.
+
+Reference: https://docs.snowflake.com/en/user-guide/snowflake-cortex/cortex-agents/api-reference
+"""
+
+import json
+import re
+from collections import namedtuple
+
+SSEEvent = namedtuple('SSEEvent', ['event', 'data', 'id'])
+
+DEFAULT_EVENT = 'message'
+DONE_SENTINEL = '[DONE]'
+
+LINE_END = re.compile(rb'\r\n|\r|\n')
+
+class SSEDecoder:
+    """
+    Stateful byte-chunk to event decoder.
+
+    Call feed() with each chunk as it arrives and close() once the stream ends.
+    Both return the list of events completed by that call.
+
+    Only the new chunk is scanned for line endings; an unterminated line is
+    kept as a list of fragments and joined once it completes, so decoding
+    stays linear in the size of an event however finely it is chunked.
+    """
+
+    def __init__(self):
+        self._pending = []
+        self._skip_lf = False
+        self._event = ''
+        self._data = []
+        self._last_id = None
+
+    def feed(self, chunk):
+        if not chunk:
+            return []
+        start = 0
+        # A chunk that ended in CR may have split a CRLF
+        if self._skip_lf:
+            self._skip_lf = False
+            if chunk.startswith(b'\n'):
+                start = 1
+
+        events = []
+        for match in LINE_END.finditer(chunk, start):
+            self._pending.append(chunk[start:match.start()])
+            start = match.end()
+            event = self._process_line(self._take_pending())
+            if event is not None:
+                events.append(event)
+        if start < len(chunk):
+            self._pending.append(chunk[start:])
+        elif chunk.endswith(b'\r'):
+            self._skip_lf = True
+        return events
+
+    def close(self):
+        """
+        Flush the stream end.
+
+        Strictly, an event without its terminating blank line is discarded, but
+        proxies sometimes drop the final newline, so a pending event is
+        dispatched rather than lost.
+        """
+        events = []
+        self._skip_lf = False
+        if self._pending:
+            event = self._process_line(self._take_pending())
+            if event is not None:
+                events.append(event)
+        event = self._dispatch()
+        if event is not None:
+            events.append(event)
+        return events
+
+    def _take_pending(self):
+        line = b''.join(self._pending).decode('utf-8', errors='replace')
+        self._pending = []
+        return line
+
+    def _process_line(self, line):
+        if not line:
+            return self._dispatch()
+        if line.startswith(':'):
+            return None  # comment / keep-alive
+
+        field, sep, value = line.partition(':')
+        if sep and value.startswith(' '):
+            value = value[1:]
+
+        if field == 'event':
+            self._event = value
+        elif field == 'data':
+            self._data.append(value)
+        elif field == 'id' and '\0' not in value:
+            self._last_id = value
+        # "retry" and unknown fields are ignored: the client never reconnects
+        return None
+
+    def _dispatch(self):
+        if not self._data:
+            self._event = ''
+            return None
+        event = SSEEvent(self._event or DEFAULT_EVENT, '\n'.join(self._data), self._last_id)
+        self._event = ''
+        self._data = []
+        return event
+
+class AgentStreamReader:
+    """
+    Consume a Cortex Agent :run stream and collect its results.
+
+    iter_text() yields answer text deltas as they arrive, which makes it a
+    direct input to st.write_stream. The other results are available as
+    attributes once iteration finishes: thread_id, message_id, tool_uses,
+    tables and error.
+    """
+
+    def __init__(self, thread_id=None):
+        self.thread_id = thread_id
+        self.message_id = None
+        self.tool_uses = []
+        self.tables = []
+        self.error = None
+        self.done = False
+        self._chunks = []
+        self._handlers = {
+            'response.text.delta': self._on_text_delta,
+            'response.tool_use': self._on_tool_use,
+            'response.table': self._on_table,
+            'response': self._on_final_response,
+            'metadata': self._on_metadata,
+            'error': self._on_error,
+            'done': self._on_done,
+            DEFAULT_EVENT: self._on_untyped,
+        }
+
+    @property
+    def text(self):
+        return ''.join(self._chunks)
+
+    def iter_text(self, chunks):
+        """Decode an iterable of byte chunks and yield text deltas."""
+        decoder = SSEDecoder()
+        for chunk in chunks:
+            for event in decoder.feed(chunk):
+                delta = self.handle(event)
+                if delta:
+                    yield delta
+            if self.done:
+                return
+        for event in decoder.close():
+            delta = self.handle(event)
+            if delta:
+                yield delta
+
+    def handle(self, event):
+        """Apply one decoded event; return its text delta, if any."""
+        if event.data.strip() == DONE_SENTINEL:
+            self.done = True
+            return None
+        try:
+            payload = json.loads(event.data)
+        except json.JSONDecodeError:
+            return None
+        if not isinstance(payload, dict):
+            return None
+
+        handler = self._handlers.get(event.event)
+        delta = handler(payload) if handler else None
+        if delta:
+            self._chunks.append(delta)
+        return delta
+
+    # Typed Cortex Agent events
+
+    def _on_text_delta(self, payload):
+        return payload.get('text')
+
+    def _on_tool_use(self, payload):
+        self.tool_uses.append(payload)
+
+    def _on_table(self, payload):
+        self.tables.append(payload)
+
+    def _on_final_response(self, payload):
+        # The final aggregate repeats every delta; only use it when nothing streamed
+        if self._chunks:
+            return None
+        return ''.join(
+            item.get('text', '')
+            for item in payload.get('content', [])
+            if isinstance(item, dict) and item.get('type') == 'text'
+        )
+
+    def _on_metadata(self, payload):
+        metadata = payload.get('metadata', payload)
+        if metadata.get('thread_id') and not self.thread_id:
+            self.thread_id = metadata['thread_id']
+        if metadata.get('role') == 'assistant' and metadata.get('message_id'):
+            self.message_id = metadata['message_id']
+
+    def _on_error(self, payload):
+        self.error = payload.get('message') or json.dumps(payload)
+
+    def _on_done(self, payload):
+        self.done = True
+
+    # Untyped events: the earlier message/delta payload shapes
+
+    def _on_untyped(self, payload):
+        if payload.get('thread_id') and not self.thread_id:
+            self.thread_id = payload['thread_id']
+
+        if 'message' in payload:
+            content = payload['message'].get('content')
+            if isinstance(content, list):
+                return ''.join(
+                    item['text'] if isinstance(item, dict) else item
+                    for item in content
+                    if isinstance(item, str) or (isinstance(item, dict) and 'text' in item)
+                )
+            if isinstance(content, str):
+                return content
+        elif isinstance(payload.get('delta'), dict) and 'content' in payload['delta']:
+            return payload['delta']['content']
+        return None
@@ -0,0 +1,280 @@
+"""
+Per-call latency telemetry for the dashboard.
+
+Recorder collects one event per loader call, per warehouse statement, per
+agent request and per export during a script run:
+
+  span         loader or call name (statements carry their parent span)
+  kind         'loader', 'query', 'agent' or 'export'
+  wall_ms      client-side wall time
+  server_ms    warehouse time (TOTAL_ELAPSED_TIME), filled in by enrich()
+  transfer_ms  wall_ms - server_ms: result transfer and to_pandas conversion
+  query_id     Snowflake query ID of a statement, filled in by enrich()
+  rows         rows returned
+  cache_hit    whether an st.cache_data / answer-cache lookup was served
+  ttft_ms      agent time to first streamed token
+
+TracedSession wraps a Snowpark session so every sql(...).to_pandas_batches() /
+collect() issued by loaders.py is timed. Statements run synchronously, each
+with its own QUERY_TAG statement parameter, so attribution stays exact when
+loaders run concurrently on worker threads and no extra round trip is added to
+the call. The query ID and server time are looked up afterwards by enrich(), by
+tag, in one statement for a whole batch of events, only when the debug panel
+is open or a batch is written to the telemetry table.
+"""
+
+import json
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+# Query IDs and server-side timings for a batch of statement tags issued by
+# this session (the latest statement per tag)
+QUERY_TIMINGS_SQL = """
+SELECT
+    query_tag,
+    query_id,
+    total_elapsed_time,
+    execution_time,
+    compilation_time,
+    queued_overload_time
+FROM TABLE(INFORMATION_SCHEMA.QUERY_HISTORY_BY_SESSION(RESULT_LIMIT => 1000))
+WHERE ARRAY_CONTAINS(query_tag::VARIANT, SPLIT(?, ','))
+QUALIFY ROW_NUMBER() OVER (PARTITION BY query_tag ORDER BY start_time DESC) = 1
+"""
+
+QUERY_TAG_PREFIX = 'dashboard-'
+
+# One statement per batch: the events travel as a single JSON array bind
+TELEMETRY_INSERT_SQL = """
+INSERT INTO SNOWFLAKE_EXAMPLE.SFE_ANALYTICS_CREDIT.DASHBOARD_TELEMETRY (
+    event_time, app_session, run_id, span, kind, parent, query_id,
+    wall_ms, server_ms, transfer_ms, row_count, cache_hit, ttft_ms, detail
+)
+SELECT
+    TO_TIMESTAMP_LTZ(value:event_time::FLOAT),
+    value:app_session::VARCHAR,
+    value:run_id::NUMBER,
+    value:span::VARCHAR,
+    value:kind::VARCHAR,
+    value:parent::VARCHAR,
+    value:query_id::VARCHAR,
+    value:wall_ms::FLOAT,
+    value:server_ms::FLOAT,
+    value:transfer_ms::FLOAT,
+    value:rows::NUMBER,
+    value:cache_hit::BOOLEAN,
+    value:ttft_ms::FLOAT,
+    value:detail
+FROM TABLE(FLATTEN(INPUT => PARSE_JSON(?)))
+"""
+
+EVENT_FIELDS = [
+    'span', 'kind', 'parent', 'cache_hit', 'wall_ms', 'server_ms', 'transfer_ms',
+    'rows', 'ttft_ms', 'query_id',
+]
+
+def new_query_tag():
+    return f'{QUERY_TAG_PREFIX}{uuid.uuid4().hex}'
+
+def enrich(session, events):
+    """Fill query_id, server_ms and transfer_ms from QUERY_HISTORY_BY_SESSION in one statement."""
+    pending = [e for e in events if e.get('query_tag') and e['server_ms'] is None]
+    if not pending:
+        return
+    rows = session.sql(QUERY_TIMINGS_SQL, params=[','.join(e['query_tag'] for e in pending)]).collect()
+    timings = {row['QUERY_TAG']: row for row in rows}
+    for event in pending:
+        row = timings.get(event['query_tag'])
+        if row is None:
+            continue
+        event['query_id'] = row['QUERY_ID']
+        event['server_ms'] = float(row['TOTAL_ELAPSED_TIME'])
+        event['transfer_ms'] = max(event['wall_ms'] - event['server_ms'], 0.0)
+        event['detail'] = {
+            'execution_ms': row['EXECUTION_TIME'],
+            'compilation_ms': row['COMPILATION_TIME'],
+            'queued_ms': row['QUEUED_OVERLOAD_TIME'],
+        }
+
+    # Roll statement timings up into the spans that issued them
+    spans = {(e.get('run_id'), e['event_id']): e for e in events if e['kind'] != 'query'}
+    for event in pending:
+        span = spans.get((event.get('run_id'), event['parent_id']))
+        if span is None or event['server_ms'] is None:
+            continue
+        span['server_ms'] = (span['server_ms'] or 0.0) + event['server_ms']
+        span['transfer_ms'] = (span['transfer_ms'] or 0.0) + event['transfer_ms']
+        span['rows'] = (span['rows'] or 0) + (event['rows'] or 0)
+
+class Recorder:
+    """
+    Collects the events of one script run. Spans nest; statements attach to the
+    innermost. The span stack is per thread, so loaders running concurrently on
+    worker threads each nest under their own span.
+    """
+
+    def __init__(self, app_session=None, run_id=None):
+        self.app_session = app_session
+        self.run_id = run_id
+        self.events = []
+        self._exported = 0
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    @property
+    def _stack(self):
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    def _event(self, span, kind, parent=None, **fields):
+        event = {field: None for field in EVENT_FIELDS}
+        event.update(
+            span=span, kind=kind, event_time=time.time(), detail=None,
+            parent=parent['span'] if parent else None,
+            parent_id=parent['event_id'] if parent else None,
+        )
+        event.update(fields)
+        with self._lock:
+            event['event_id'] = len(self.events)
+            self.events.append(event)
+        return event
+
+    @property
+    def current(self):
+        return self._stack[-1] if self._stack else None
+
+    @contextmanager
+    def span(self, name, kind='loader'):
+        """
+        Time a block. Loader spans start as cache hits; mark_miss() flips that
+        from inside the cached function body, which only runs on a miss.
+        """
+        event = self._event(name, kind, self.current, cache_hit=True if kind == 'loader' else None)
+        self._stack.append(event)
+        start = time.perf_counter()
+        try:
+            yield event
+        finally:
+            event['wall_ms'] = (time.perf_counter() - start) * 1e3
+            self._stack.pop()
+
+    def mark_miss(self):
+        if self.current is not None:
+            self.current['cache_hit'] = False
+
+    def query(self, query_tag, wall_seconds, rows):
+        parent = self.current
+        self._event(parent['span'] if parent else 'app', 'query', parent,
+                    query_tag=query_tag, wall_ms=wall_seconds * 1e3, rows=rows)
+
+    def records(self):
+        """Events stamped with the session and run, ready for the telemetry table."""
+        with self._lock:
+            events = list(self.events)
+        for event in events:
+            event.update(app_session=self.app_session, run_id=self.run_id)
+        return events
+
+    def take_new(self):
+        """Records added since the last call, so fragment reruns export only their own events."""
+        records = self.records()
+        new, self._exported = records[self._exported:], len(records)
+        return new
+
+def trace_stream(deltas, event):
+    """
+    Pass a text-delta stream through, stamping time to first token on the
+    agent event. TTFT is measured from the start of the span, so it includes
+    the request itself, as the user experiences it.
+    """
+    for delta in deltas:
+        if event['ttft_ms'] is None:
+            event['ttft_ms'] = (time.time() - event['event_time']) * 1e3
+        yield delta
+
+class TracedSession:
+    """Snowpark session wrapper that reports each statement's timing and query tag to a Recorder."""
+
+    def __init__(self, session, recorder):
+        self._session = session
+        self._recorder = recorder
+
+    def sql(self, statement, params=None):
+        return _TracedStatement(self._session.sql(statement, params=params), self._recorder)
+
+    def __getattr__(self, name):
+        return getattr(self._session, name)
+
+class _TracedStatement:
+    def __init__(self, frame, recorder):
+        self._frame = frame
+        self._recorder = recorder
+
+    def to_pandas(self):
+        return self._run(self._frame.to_pandas, len)
+
+    def to_pandas_batches(self):
+        # Batches are yielded as they arrive, so a consumer such as an export
+        # holds one at a time; the statement is recorded once the iterator is
+        # drained or closed early, so wall time covers the whole fetch
+        query_tag = new_query_tag()
+        start = time.perf_counter()
+        rows = 0
+        try:
+            for batch in self._frame.to_pandas_batches(statement_params={'QUERY_TAG': query_tag}):
+                rows += len(batch)
+                yield batch
+        finally:
+            self._recorder.query(query_tag, time.perf_counter() - start, rows)
+
+    def collect(self):
+        return self._run(self._frame.collect, len)
+
+    def __getattr__(self, name):
+        return getattr(self._frame, name)
+
+    def _run(self, fetch, count_rows):
+        # The tag identifies this statement in the query history even when
+        # other threads are running statements on the same session
+        query_tag = new_query_tag()
+        start = time.perf_counter()
+        result = fetch(statement_params={'QUERY_TAG': query_tag})
+        wall = time.perf_counter() - start
+        self._recorder.query(query_tag, wall, count_rows(result))
+        return result
+
+class TelemetryBuffer:
+    """
+    Accumulates records across reruns and writes them in batches.
+
+    flush_due() is true once max_events have queued or the oldest record is
+    older than max_age_seconds; write failures disable the table sink for the
+    rest of the session instead of slowing every rerun.
+    """
+
+    def __init__(self, max_events=50, max_age_seconds=300):
+        self.max_events = max_events
+        self.max_age_seconds = max_age_seconds
+        self.pending = []
+        self.enabled = True
+
+    def extend(self, records):
+        if self.enabled:
+            self.pending.extend(records)
+
+    def flush_due(self):
+        if not self.enabled or not self.pending:
+            return False
+        return (len(self.pending) >= self.max_events
+                or time.time() - self.pending[0]['event_time'] >= self.max_age_seconds)
+
+    def flush(self, session):
+        batch, self.pending = self.pending, []
+        try:
+            enrich(session, batch)
+            session.sql(TELEMETRY_INSERT_SQL, params=[json.dumps(batch, default=str)]).collect()
+        except Exception:
+            self.enabled = False
@@ -21,7 +21,7 @@
  * CLEANUP ORDER:
  *   1. Application layer (Streamlit, Agents)
  *   2. Semantic views (our view only)
- *   3. Views and helper objects
+ *   3. Views, dynamic tables and helper objects
  *   4. Star schema tables (dimensions and facts)
  *   5. Schemas (CASCADE to catch any remaining objects)
  *   6. Dedicated warehouse
@@ -45,6 +45,20 @@ DROP STREAMLIT IF EXISTS SNOWFLAKE_EXAMPLE.SFE_ANALYTICS_CREDIT.SFE_CREDIT_PORTF
 -- Drop Cortex Agent (account-level object)
 DROP AGENT IF EXISTS snowflake_intelligence.agents.CREDIT_PORTFOLIO_ANALYST;
 
+-- Drop shared agent answer cache
+DROP TABLE IF EXISTS SNOWFLAKE_EXAMPLE.SFE_ANALYTICS_CREDIT.AGENT_ANSWER_CACHE;
+
+-- Drop post-load pre-warming (task first, so it cannot fire mid-teardown)
+DROP TASK IF EXISTS SNOWFLAKE_EXAMPLE.SFE_ANALYTICS_CREDIT.TASK_PREWARM_DASHBOARD;
+DROP PROCEDURE IF EXISTS SNOWFLAKE_EXAMPLE.SFE_ANALYTICS_CREDIT.SP_PREWARM_DASHBOARD(BOOLEAN);
+DROP STREAM IF EXISTS SNOWFLAKE_EXAMPLE.SFE_ANALYTICS_CREDIT.FACT_POSITION_SNAPSHOT_LOADS;
+
+-- Drop dashboard export stage (and any exports on it)
+DROP STAGE IF EXISTS SNOWFLAKE_EXAMPLE.SFE_ANALYTICS_CREDIT.SFE_DASHBOARD_EXPORTS;
+
+-- Drop dashboard telemetry
+DROP TABLE IF EXISTS SNOWFLAKE_EXAMPLE.SFE_ANALYTICS_CREDIT.DASHBOARD_TELEMETRY;
+
 -- ============================================================================
 -- LAYER 2: Semantic Views (our view only, preserve schema)
 -- ============================================================================
@@ -59,6 +73,14 @@ DROP VIEW IF EXISTS SNOWFLAKE_EXAMPLE.SFE_ANALYTICS_CREDIT.V_CURRENT_PORTFOLIO_S
 DROP VIEW IF EXISTS SNOWFLAKE_EXAMPLE.SFE_ANALYTICS_CREDIT.V_WATCHLIST_DEALS;
 DROP VIEW IF EXISTS SNOWFLAKE_EXAMPLE.SFE_ANALYTICS_CREDIT.V_MONTHLY_EXPOSURE_TRENDS;
 
+-- Drop dashboard rollups (downstream dynamic tables first)
+DROP DYNAMIC TABLE IF EXISTS SNOWFLAKE_EXAMPLE.SFE_ANALYTICS_CREDIT.DT_DEAL_DELTAS;
+DROP DYNAMIC TABLE IF EXISTS SNOWFLAKE_EXAMPLE.SFE_ANALYTICS_CREDIT.DT_PORTFOLIO_MONTH_END;
+DROP DYNAMIC TABLE IF EXISTS SNOWFLAKE_EXAMPLE.SFE_ANALYTICS_CREDIT.DT_SNAPSHOT_DATES;
+-- DT_INDUSTRY_DAILY is no longer deployed; dropped in case an earlier version created it
+DROP DYNAMIC TABLE IF EXISTS SNOWFLAKE_EXAMPLE.SFE_ANALYTICS_CREDIT.DT_INDUSTRY_DAILY;
+DROP DYNAMIC TABLE IF EXISTS SNOWFLAKE_EXAMPLE.SFE_ANALYTICS_CREDIT.DT_DEAL_DAILY;
+
 -- ============================================================================
 -- LAYER 4: Star Schema Tables (Dimensions and Facts)
 -- ============================================================================